@@ -0,0 +1,75 @@
+"""
+Compare regex -> DFA constructions on the regexes of the tests_2 fixtures:
+Thompson + subset construction against the followpos method.
+
+Run from the repository root with: python -m bench.regex_to_dfa
+"""
+import os
+import time
+
+from src.Regex import parse_regex
+
+FIXTURES = [
+    ('a', 'character'),
+    ('aa', 'concat_1'),
+    ('ab', 'concat_2'),
+    ('a | b', 'union'),
+    ('ca | cb', 'concat_union_1'),
+    ('c(a | b)', 'concat_union_2'),
+    ('a*', 'kleene_star'),
+    ('(ab)*', 'concat_kleene_star'),
+    ('(a | b)*', 'union_kleene_star'),
+    ('c(a | b)*', 'concat_union_kleene_star_1'),
+    ('(ab | cd)*', 'concat_union_kleene_star_2'),
+    ('a?', 'optional'),
+    ('c(a | b)?', 'complex_optional'),
+    ('a+', 'plus'),
+    ('c(a | b)+', 'complex_plus'),
+    ('[0-9]', 'digit'),
+    ('[0-9]+', 'digits'),
+    ('[a-z]', 'small_letter'),
+    ('[a-z]+', 'small_letters'),
+    ('[A-Z]', 'big_letter'),
+    ('[A-Z]+', 'big_letters'),
+    ('(ab | cd+ | b*)? efg', '1'),
+    (r'[a-z]*\ [a-z]*', '2'),
+    ('(\n|[a-z])*', '3'),
+    ('(a|(bb*a))(a|(bb*a))*', '4'),
+    ('[A-Z]?([a-z]*[0-9])*', '5'),
+    ('(a|b)*c(a|b)*c(a|b)*', '6'),
+    ('a(b|c)(d|e)|abb|abc', '7'),
+    ('(this_needs_to_match_a_really_long_string_or_nothing)?', '9'),
+    ('((-|.)(-|.)(-|.))|(.(-|.)(--|-.|..))|(-(-.|..|.-)(-|.))', '11'),
+    (r'((((-|.)(-|.)(-|.))|(.(-|.)(--|-.|..))|(-(-.|..|.-)(-|.)))\ )+', '12'),
+    (r'[0-9]+((\+|-)[0-9]+)*', '15'),
+    (r'\/\*([A-Z]|[a-z]|[0-9]|\ )*\*\/', '16'),
+]
+
+REPEAT = 20
+
+
+def measure(build) -> tuple[float, int]:
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        dfa = build()
+    return (time.perf_counter() - start) / REPEAT, len(dfa.K)
+
+
+def main() -> None:
+    print(f'{"fixture":<28}{"thompson ms":>12}{"states":>8}{"followpos ms":>14}{"states":>8}')
+    totals = [0.0, 0.0]
+    for regex, name in FIXTURES:
+        if not os.path.exists(f'./tests_2/{name}.txt'):
+            continue
+        tree = parse_regex(regex)
+        assert tree.thompson().subset_construction().equivalent(tree.to_dfa_followpos()), regex
+        thompson, thompson_states = measure(lambda: tree.thompson().subset_construction())
+        followpos, followpos_states = measure(lambda: tree.to_dfa_followpos())
+        totals[0] += thompson
+        totals[1] += followpos
+        print(f'{name:<28}{thompson * 1000:>12.3f}{thompson_states:>8}{followpos * 1000:>14.3f}{followpos_states:>8}')
+    print(f'{"total":<28}{totals[0] * 1000:>12.3f}{"":>8}{totals[1] * 1000:>14.3f}')
+
+
+if __name__ == '__main__':
+    main()
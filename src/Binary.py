@@ -0,0 +1,197 @@
+import mmap as _mmap
+import os
+import struct
+import sys
+from array import array
+
+from .CompiledDFA import CompiledDFA
+from .DFA import DFA
+from .NFA import NFA, EPSILON
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, it is only needed by save_npz
+    np = None
+
+# File layout, all integers little-endian:
+#   header      magic 'LFAB', u16 version, u16 kind
+#   DFA         u32 states, u32 width, u32 symbols
+#   NFA         u32 states, u32 q0, u32 symbols
+#   symbols     (u32 column, u32 length, utf-8 bytes) per symbol
+#   final       one byte per state, then zero padding up to a multiple of 4
+#   DFA         int32 table[states * width], the CompiledDFA table (row offsets)
+#   NFA         int32 offsets[states * symbols + 1], int32 targets[offsets[-1]]:
+#               the targets of (state, symbol) are targets[offsets[state * symbols + symbol]:...]
+MAGIC = b'LFAB'
+VERSION = 1
+KIND_DFA = 0
+KIND_NFA = 1
+
+HEADER = struct.Struct('<4sHH')
+COUNTS = struct.Struct('<III')
+SYMBOL = struct.Struct('<II')
+
+
+def _ints(values) -> bytes:
+    ints = array('i', values)
+    if sys.byteorder == 'big':
+        ints.byteswap()
+    return ints.tobytes()
+
+
+def _write_symbols(f, symbols: list[tuple[str, int]]) -> None:
+    for symbol, column in symbols:
+        data = symbol.encode('utf-8')
+        f.write(SYMBOL.pack(column, len(data)))
+        f.write(data)
+
+
+def _write_final(f, final: bytes) -> None:
+    f.write(final)
+    f.write(bytes(-f.tell() % 4))
+
+
+def save(automaton: DFA | CompiledDFA | NFA, path: str | os.PathLike) -> None:
+    """
+    Write an automaton in the binary format. A DFA is compiled first, the states are stored as ints.
+    """
+    if isinstance(automaton, DFA):
+        automaton = automaton.compile()
+
+    with open(path, 'wb') as f:
+        if isinstance(automaton, CompiledDFA):
+            f.write(HEADER.pack(MAGIC, VERSION, KIND_DFA))
+            f.write(COUNTS.pack(len(automaton.labels), automaton.width, len(automaton.columns)))
+            _write_symbols(f, list(automaton.columns.items()))
+            _write_final(f, automaton.final)
+            f.write(_ints(automaton.table))
+            return
+
+        states = list(automaton.K)
+        index = {state: i for i, state in enumerate(states)}
+        symbols = list(automaton.S)
+        if any(symbol == EPSILON for _, symbol in automaton.d):
+            symbols.append(EPSILON)
+
+        offsets = [0]
+        targets = []
+        for state in states:
+            for symbol in symbols:
+                targets.extend(index[target] for target in automaton.d.get((state, symbol), ()))
+                offsets.append(len(targets))
+
+        f.write(HEADER.pack(MAGIC, VERSION, KIND_NFA))
+        f.write(COUNTS.pack(len(states), index[automaton.q0], len(symbols)))
+        _write_symbols(f, [(symbol, column) for column, symbol in enumerate(symbols)])
+        _write_final(f, bytes(state in automaton.F for state in states))
+        f.write(_ints(offsets))
+        f.write(_ints(targets))
+
+
+def _unpack(layout: struct.Struct, data: memoryview, position: int) -> tuple:
+    if position + layout.size > len(data):
+        raise ValueError('truncated file')
+    return layout.unpack_from(data, position)
+
+
+def _int_view(data: memoryview, position: int, count: int):
+    # count int32 values starting at position, as a view of the data on little-endian machines
+    end = position + 4 * count
+    if end > len(data):
+        raise ValueError('truncated file')
+    ints = data[position:end]
+    if sys.byteorder == 'little':
+        return ints.cast('i')
+    ints = array('i', ints.tobytes())
+    ints.byteswap()
+    return ints
+
+
+def load(path: str | os.PathLike, mmap: bool = True) -> CompiledDFA[int] | NFA[int]:
+    """
+    Read an automaton written by save.
+    :param mmap: Map the file instead of reading it. The transition table of a DFA is then used
+                 directly from the mapping, without copying it. The mapping has no close method of its
+                 own, it is unmapped when the returned CompiledDFA (and any view of its table) is
+                 garbage collected. An NFA is copied out of the mapping, which is released on return.
+    :return: A CompiledDFA for a DFA file, an NFA for an NFA file. States are numbered 0..n-1.
+    :raises ValueError: If the file is not in this format, or is truncated.
+    """
+    with open(path, 'rb') as f:
+        if mmap and os.fstat(f.fileno()).st_size:
+            data = memoryview(_mmap.mmap(f.fileno(), 0, access=_mmap.ACCESS_READ))
+        else:
+            data = memoryview(f.read())
+
+    magic, version, kind = _unpack(HEADER, data, 0)
+    if magic != MAGIC:
+        raise ValueError('invalid file format')
+    if version != VERSION:
+        raise ValueError(f'unsupported format version: {version}')
+
+    n, extra, n_symbols = _unpack(COUNTS, data, HEADER.size)
+    position = HEADER.size + COUNTS.size
+
+    symbols = []
+    for _ in range(n_symbols):
+        column, length = _unpack(SYMBOL, data, position)
+        position += SYMBOL.size
+        if position + length > len(data):
+            raise ValueError('truncated file')
+        symbols.append((bytes(data[position:position + length]).decode('utf-8'), column))
+        position += length
+
+    if position + n > len(data):
+        raise ValueError('truncated file')
+    final = bytes(data[position:position + n])
+    position += n + (-(position + n) % 4)
+
+    if kind == KIND_DFA:
+        width = extra
+        return CompiledDFA(
+            labels=tuple(range(n)),
+            columns=dict(symbols),
+            width=width,
+            table=_int_view(data, position, n * width),
+            final=final,
+        )
+
+    if kind == KIND_NFA:
+        offsets = _int_view(data, position, n * n_symbols + 1)
+        targets = _int_view(data, position + 4 * len(offsets), offsets[-1])
+        d = {}
+        for state in range(n):
+            for symbol, column in symbols:
+                i = state * n_symbols + column
+                if offsets[i] != offsets[i + 1]:
+                    d[(state, symbol)] = set(targets[offsets[i]:offsets[i + 1]])
+        return NFA(
+            S={symbol for symbol, _ in symbols if symbol != EPSILON},
+            K=set(range(n)),
+            q0=extra,
+            d=d,
+            F={state for state in range(n) if final[state]},
+        )
+
+    raise ValueError(f'unknown automaton kind: {kind}')
+
+
+def save_npz(automaton: DFA | CompiledDFA, path: str | os.PathLike) -> None:
+    """
+    Export a DFA as a numpy .npz archive with the arrays symbols, columns, transitions (state ids,
+    one row per state and one column per symbol class) and final.
+    """
+    if np is None:
+        raise ImportError('save_npz requires numpy')
+    if isinstance(automaton, DFA):
+        automaton = automaton.compile()
+
+    width = automaton.width
+    transitions = np.frombuffer(automaton.table, dtype=np.intc).reshape(-1, width) // width
+    np.savez(
+        path,
+        symbols=np.array(list(automaton.columns), dtype=str),
+        columns=np.array(list(automaton.columns.values()), dtype=np.intc),
+        transitions=transitions[:, :-1],
+        final=np.frombuffer(automaton.final, dtype=np.uint8).astype(bool),
+    )
@@ -0,0 +1,210 @@
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Generic, TypeVar
+
+from .DFA import DFA
+
+STATE = TypeVar('STATE')
+
+
+def bits(mask: int) -> Iterable[int]:
+    """
+    Yield the positions of the set bits of a mask, lowest first.
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+@dataclass(frozen=True)
+class BitsetNFA(Generic[STATE]):
+    """
+    NFA whose states are numbered 0..n-1, so that a set of states is an int with one bit per state.
+    All the masks are epsilon-closed.
+    """
+    labels: tuple[STATE, ...]  # Bit i stands for the state labels[i]
+    S: frozenset[str]  # Alphabet
+    start: int  # Epsilon closure of the initial state
+    final: int  # Final states
+    closures: tuple[int, ...]  # closures[i] is the epsilon closure of state i
+    moves: dict[str, tuple[int, ...]]  # moves[symbol][i] is the closure of the targets of state i on symbol
+    out: tuple[tuple[tuple[str, int], ...], ...]  # out[i] lists the (symbol, mask) pairs of state i with a nonempty mask
+
+    @classmethod
+    def from_nfa(cls, nfa) -> 'BitsetNFA[STATE]':
+        labels = tuple(nfa.K | {state for state, _ in nfa.d} | {target for targets in nfa.d.values() for target in targets})
+        index = {state: i for i, state in enumerate(labels)}
+
+        def mask_of(states: Iterable[STATE]) -> int:
+            mask = 0
+            for state in states:
+                mask |= 1 << index[state]
+            return mask
+
+        closures = nfa.epsilon_closures()
+        closure_masks = tuple(mask_of(closures[state]) for state in labels)
+
+        moves = {symbol: [0] * len(labels) for symbol in nfa.S}
+        out = [[] for _ in labels]
+        for (state, symbol), targets in nfa.d.items():
+            if symbol not in moves:
+                continue
+            mask = 0
+            for target in targets:
+                mask |= closure_masks[index[target]]
+            if mask:
+                moves[symbol][index[state]] = mask
+                out[index[state]].append((symbol, mask))
+
+        return cls(
+            labels=labels,
+            S=frozenset(nfa.S),
+            start=closure_masks[index[nfa.q0]],
+            final=mask_of(nfa.F),
+            closures=closure_masks,
+            moves={symbol: tuple(move) for symbol, move in moves.items()},
+            out=tuple(tuple(pairs) for pairs in out),
+        )
+
+    def states_of(self, mask: int) -> frozenset[STATE]:
+        return frozenset(self.labels[i] for i in bits(mask))
+
+    def step(self, mask: int, symbol: str) -> int:
+        """
+        The closed set of states reached from the states of mask on symbol.
+        """
+        move = self.moves.get(symbol)
+        if move is None:
+            return 0
+
+        target = 0
+        while mask:
+            low = mask & -mask
+            target |= move[low.bit_length() - 1]
+            mask ^= low
+        return target
+
+    def run(self, word: str, mask: int | None = None) -> int:
+        """
+        Simulate the NFA over a word, keeping the set of active states.
+        :param mask: The active states to start from, the closure of the initial state by default.
+        :return: The active states after the word, 0 as soon as no state is active.
+        """
+        if mask is None:
+            mask = self.start
+
+        moves = self.moves
+        for ch in word:
+            move = moves.get(ch)
+            if move is None or not mask:
+                return 0
+
+            target = 0
+            while mask:
+                low = mask & -mask
+                target |= move[low.bit_length() - 1]
+                mask ^= low
+            mask = target
+        return mask
+
+    def accept(self, word: str) -> bool:
+        return bool(self.run(word) & self.final)
+
+    def expand(self, mask: int) -> dict[str, int]:
+        """
+        The closed targets of the states of mask on every symbol with a nonempty target.
+        """
+        out = self.out
+        targets = {}
+        while mask:
+            low = mask & -mask
+            for symbol, target in out[low.bit_length() - 1]:
+                targets[symbol] = targets.get(symbol, 0) | target
+            mask ^= low
+        return targets
+
+    def subset_construction(self, labels: str = 'frozenset', workers: int | None = None,
+                            chunk_size: int = 256) -> DFA:
+        """
+        Determinize the NFA, every reachable mask is expanded once. The masks are discovered one BFS
+        frontier at a time, so the ids and the result do not depend on the number of workers.
+        :param labels: 'frozenset' labels the DFA states like NFA.subset_construction does (with the
+                       sink state frozenset({'x'})), 'bitmask' labels them by their masks (the sink is 0).
+        :param workers: Expand every frontier in a pool of this many processes, each one receives
+                        the NFA once. None expands in this process.
+        :param chunk_size: Number of masks sent to a worker at once.
+        """
+        if labels not in ('frozenset', 'bitmask'):
+            raise ValueError(f'unknown state labels: {labels}')
+
+        index = {self.start: 0}
+        masks = [self.start]
+        transitions = {}
+        sink_used = False
+
+        pool = None
+        if workers is not None:
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self,))
+
+        try:
+            frontier = [self.start]
+            while frontier:
+                chunks = [frontier[i:i + chunk_size] for i in range(0, len(frontier), chunk_size)]
+                if pool is None:
+                    expanded = (_expand_chunk(chunk, self) for chunk in chunks)
+                else:
+                    expanded = pool.map(_expand_chunk, chunks)
+
+                frontier = []
+                for chunk, chunk_targets in zip(chunks, expanded):
+                    for mask, targets in zip(chunk, chunk_targets):
+                        for symbol in self.S:
+                            target = targets.get(symbol, 0)
+                            if target == 0:
+                                sink_used = True
+                            elif target not in index:
+                                index[target] = len(masks)
+                                masks.append(target)
+                                frontier.append(target)
+                            transitions[(mask, symbol)] = target
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        if sink_used:
+            masks.append(0)
+            for symbol in self.S:
+                transitions[(0, symbol)] = 0
+
+        if labels == 'bitmask':
+            return DFA(
+                S=set(self.S),
+                K=set(masks),
+                q0=self.start,
+                d=transitions,
+                F={mask for mask in masks if mask & self.final},
+            )
+
+        names = {mask: self.states_of(mask) if mask else frozenset({'x'}) for mask in masks}
+        return DFA(
+            S=set(self.S),
+            K=set(names.values()),
+            q0=names[self.start],
+            d={(names[mask], symbol): names[target] for (mask, symbol), target in transitions.items()},
+            F={names[mask] for mask in masks if mask & self.final},
+        )
+
+
+_worker_nfa = None  # The BitsetNFA of a worker process of subset_construction
+
+
+def _init_worker(nfa: BitsetNFA) -> None:
+    global _worker_nfa
+    _worker_nfa = nfa
+
+
+def _expand_chunk(masks: list[int], nfa: BitsetNFA | None = None) -> list[dict[str, int]]:
+    nfa = nfa or _worker_nfa
+    return [nfa.expand(mask) for mask in masks]
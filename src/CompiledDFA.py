@@ -0,0 +1,319 @@
+import math
+import mmap
+import os
+from array import array
+from collections import deque
+from collections.abc import Buffer, Iterable
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Generic, TypeVar
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, accept_many falls back to a loop over accept
+    np = None
+
+STATE = TypeVar('STATE')
+
+@dataclass(frozen=True)
+class CompiledDFA(Generic[STATE]):
+    labels: tuple[STATE, ...]  # labels[i] is the DFA state numbered i, q0 is 0
+    columns: dict[str, int]  # Class id of every alphabet symbol, symbols of a class have the same transitions
+    width: int  # Number of classes, the last one is used for symbols outside the alphabet
+    table: array  # Row-major transitions, stored as row offsets (target * width)
+    final: bytes  # final[i] is 1 if state i is accepting
+
+    CHUNK = 1 << 16  # Bytes translated at once when running over a bytes-like object
+
+    def run(self, word: str | Buffer, state: int = 0) -> int:
+        """
+        Run the automaton over a word.
+        :param word: The input word, either a str or a bytes-like object (bytes, bytearray, memoryview, mmap)
+                     whose bytes are read as the characters chr(0)..chr(255).
+        :param state: The id of the state to start from.
+        :return: The id of the state reached after consuming the whole word.
+        """
+        return self._advance(state * self.width, word) // self.width
+
+    def _advance(self, offset: int, word: str | Buffer) -> int:
+        table = self.table
+
+        if self.width > 256:
+            # class ids do not fit in a byte, look every symbol up
+            if isinstance(word, str):
+                column = self.columns.get
+                other = self.width - 1
+                for ch in word:
+                    offset = table[offset + column(ch, other)]
+                return offset
+
+            columns = self.byte_columns
+            with memoryview(word) as view, view.cast('B') as data:
+                for byte in data:
+                    offset = table[offset + columns[byte]]
+            return offset
+
+        # translate the input to class ids in C, the loop only indexes the table
+        if isinstance(word, str):
+            for column in word.translate(self.translation).encode('latin-1'):
+                offset = table[offset + column]
+            return offset
+
+        classes = self.byte_classes
+        with memoryview(word) as view, view.cast('B') as data:
+            for start in range(0, len(data), self.CHUNK):
+                for column in data[start:start + self.CHUNK].tobytes().translate(classes):
+                    offset = table[offset + column]
+        return offset
+
+    @cached_property
+    def byte_columns(self) -> array:
+        """
+        Class id of every byte value, the byte b standing for the symbol chr(b).
+        """
+        other = self.width - 1
+        return array('i', (self.columns.get(chr(byte), other) for byte in range(256)))
+
+    @cached_property
+    def byte_classes(self) -> bytes:
+        """
+        byte_columns as a bytes.translate table, for at most 256 classes.
+        """
+        return bytes(self.byte_columns.tolist())
+
+    @cached_property
+    def translation(self) -> dict[int, str]:
+        """
+        str.translate table from characters to chr(class id), for at most 256 classes.
+        """
+        translation = _Translation(chr(self.width - 1))
+        for symbol, column in self.columns.items():
+            if len(symbol) == 1:
+                translation[ord(symbol)] = chr(column)
+        return translation
+
+    @cached_property
+    def dead(self) -> bytes:
+        """
+        dead[i] is 1 if no accepting state can be reached from state i.
+        """
+        width = self.width
+        predecessors = [[] for _ in self.labels]
+        for i in range(len(self.labels)):
+            for offset in self.table[i * width:(i + 1) * width]:
+                predecessors[offset // width].append(i)
+
+        alive = bytearray(self.final)
+        stack = [i for i, f in enumerate(self.final) if f]
+        while stack:
+            for i in predecessors[stack.pop()]:
+                if not alive[i]:
+                    alive[i] = 1
+                    stack.append(i)
+        return bytes(1 - a for a in alive)
+
+    def runner(self) -> 'DFARunner[STATE]':
+        return DFARunner(self)
+
+    def accept(self, word: str | Buffer) -> bool:
+        return self.final[self.run(word)] == 1
+
+    def accept_file(self, path: str | os.PathLike) -> bool:
+        """
+        Run the automaton over the bytes of a file, which is memory-mapped instead of read.
+        """
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return self.final[0] == 1
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return self.accept(data)
+
+    def final_state(self, word: str | Buffer) -> STATE:
+        return self.labels[self.run(word)]
+
+    def accept_many(self, words: Iterable[str]):
+        """
+        Check many words at once, advancing all of them one character position at a time.
+        :param words: The input words.
+        :return: A numpy boolean array (a list of bools if numpy is not installed).
+        """
+        words = list(words)
+        if np is None:
+            return [self.accept(word) for word in words]
+
+        accepted = np.zeros(len(words), dtype=bool)
+        if not words:
+            return accepted
+
+        # longest words first, so the words still running at position j are a prefix of the rows
+        lengths = np.fromiter(map(len, words), dtype=np.intp, count=len(words))
+        order = np.argsort(-lengths, kind='stable')
+        lengths = lengths[order]
+        longest = int(lengths[0])
+
+        offsets = np.zeros(len(words), dtype=np.intp)
+        if longest:
+            codes = np.array([words[i] for i in order], dtype=f'U{longest}')
+            codes = codes.view(np.uint32).reshape(len(words), longest)
+
+            symbols = {ord(symbol): column for symbol, column in self.columns.items() if len(symbol) == 1}
+            lookup = np.full(max(int(codes.max()), *symbols, 0) + 1, self.width - 1, dtype=np.intp)
+            for code, column in symbols.items():
+                lookup[code] = column
+            columns = lookup[codes]
+
+            table = np.frombuffer(self.table, dtype=np.intc).astype(np.intp)
+            running = np.searchsorted(-lengths, -np.arange(longest), side='left')
+            for j in range(longest):
+                k = running[j]
+                offsets[:k] = table[offsets[:k] + columns[:k, j]]
+
+        final = np.frombuffer(self.final, dtype=np.uint8)
+        accepted[order] = final[offsets // self.width] == 1
+        return accepted
+
+    def _successors(self, state: int) -> Iterable[tuple[int, int]]:
+        # (column, target) pairs of the alphabet columns, without the column of the other symbols
+        width = self.width
+        row = state * width
+        for column in range(width - 1):
+            yield column, self.table[row + column] // width
+
+    @cached_property
+    def _shortest_words(self) -> dict[int, tuple[int, int] | None]:
+        # BFS tree from q0: state -> (previous state, column), in order of distance
+        previous = {0: None}
+        queue = deque([0])
+        while queue:
+            state = queue.popleft()
+            for column, target in self._successors(state):
+                if target not in previous:
+                    previous[target] = (state, column)
+                    queue.append(target)
+        return previous
+
+    @cached_property
+    def _longest_word(self) -> int | float | None:
+        live = [state for state in self._shortest_words if not self.dead[state]]
+        if not live:
+            return None
+
+        # topological order of the live states (Kahn), a leftover state lies on a cycle
+        indegree = dict.fromkeys(live, 0)
+        for state in live:
+            for _, target in self._successors(state):
+                if target in indegree:
+                    indegree[target] += 1
+
+        longest = dict.fromkeys(live, -1)
+        longest[0] = 0
+        queue = deque(state for state in live if indegree[state] == 0)
+        ordered = 0
+        while queue:
+            state = queue.popleft()
+            ordered += 1
+            for _, target in self._successors(state):
+                if target in indegree:
+                    longest[target] = max(longest[target], longest[state] + 1)
+                    indegree[target] -= 1
+                    if indegree[target] == 0:
+                        queue.append(target)
+
+        if ordered < len(live):
+            return math.inf
+        return max(longest[state] for state in live if self.final[state])
+
+    def is_empty(self) -> bool:
+        return self._longest_word is None
+
+    def is_finite(self) -> bool:
+        return self._longest_word != math.inf
+
+    def max_word_length(self) -> int | float | None:
+        """
+        :return: The length of the longest accepted word, math.inf if the language is infinite
+                 and None if it is empty.
+        """
+        return self._longest_word
+
+    def shortest_word(self) -> str | None:
+        """
+        :return: A shortest accepted word, None if the language is empty.
+        """
+        previous = self._shortest_words
+        accepting = [state for state in previous if self.final[state]]
+        if not accepting:
+            return None
+
+        symbols = {}
+        for symbol, column in self.columns.items():
+            symbols.setdefault(column, symbol)
+
+        word = []
+        step = previous[accepting[0]]
+        while step is not None:
+            state, column = step
+            word.append(symbols[column])
+            step = previous[state]
+        return ''.join(reversed(word))
+
+
+class _Translation(dict):
+    # characters missing from the table are outside the alphabet. They are not stored,
+    # so arbitrary input does not grow the table
+    def __init__(self, other: str) -> None:
+        super().__init__()
+        self.other = other
+
+    def __missing__(self, key: int) -> str:
+        return self.other
+
+
+class DFARunner(Generic[STATE]):
+    """
+    Resumable run of a compiled DFA over input that arrives in chunks.
+    Only the current state is kept between chunks.
+    """
+    BLOCK = 4096  # Characters consumed between two dead state checks
+
+    def __init__(self, dfa: CompiledDFA[STATE]) -> None:
+        self.dfa = dfa
+        self._offset = 0
+
+    @property
+    def state_id(self) -> int:
+        return self._offset // self.dfa.width
+
+    @property
+    def state(self) -> STATE:
+        return self.dfa.labels[self.state_id]
+
+    def is_dead(self) -> bool:
+        return self.dfa.dead[self.state_id] == 1
+
+    def is_accepting(self) -> bool:
+        return self.dfa.final[self.state_id] == 1
+
+    def feed(self, chunk: str | Buffer) -> bool:
+        """
+        Consume the next chunk of input.
+        :param chunk: The next part of the word, a str or a bytes-like object.
+        :return: False if the runner is in a dead state, so the remaining input can be skipped.
+        """
+        dfa = self.dfa
+        dead = dfa.dead
+        offset = self._offset
+
+        if not isinstance(chunk, str):
+            chunk = memoryview(chunk).cast('B')
+
+        for start in range(0, len(chunk), self.BLOCK):
+            if dead[offset // dfa.width]:
+                break
+            offset = dfa._advance(offset, chunk[start:start + self.BLOCK])
+
+        self._offset = offset
+        return not dead[offset // dfa.width]
+
+    def reset(self) -> None:
+        self._offset = 0
@@ -1,7 +1,13 @@
-from collections.abc import Callable
+import operator
+import os
+from array import array
+from collections import deque
+from collections.abc import Callable, Iterable
 from dataclasses import dataclass
 from typing import TypeVar
 
+from .CompiledDFA import CompiledDFA, DFARunner
+
 STATE = TypeVar('STATE')
 
 @dataclass
@@ -26,12 +32,278 @@ class DFA[STATE]:
             return False
 
 
+    def __setattr__(self, name, value) -> None:
+        super().__setattr__(name, value)
+        if name in ('S', 'K', 'q0', 'd', 'F'):
+            self.invalidate()
+
+    def invalidate(self) -> None:
+        """
+        Drop the data cached on this DFA. Assigning any of its fields does it automatically,
+        it only has to be called after changing S, K, d or F in place.
+        """
+        self.__dict__.pop('_cache', None)
+
+    def compile(self) -> CompiledDFA[STATE]:
+        """
+        Number the states, group the symbols that behave the same in every state into classes
+        and flatten the transition function into an integer table with one column per class.
+        The result is cached on the DFA, so the queries that go through it share one table.
+        :return: An immutable runner that behaves like accept.
+        """
+        cache = self.__dict__.setdefault('_cache', {})
+        if 'compiled' not in cache:
+            cache['compiled'] = self._compile()
+        return cache['compiled']
+
+    def _compile(self) -> CompiledDFA[STATE]:
+        labels = [self.q0] + [state for state in self.K if state != self.q0]
+        index = {state: i for i, state in enumerate(labels)}
+
+        classes = {}  # Targets of a class from every state -> class id
+        columns = {}
+        for symbol in self.S:
+            targets = tuple(index[self.d.get((state, symbol), state)] for state in labels)
+            columns[symbol] = classes.setdefault(targets, len(classes))
+        width = len(classes) + 1
+
+        table = array('i')
+        for i in range(len(labels)):
+            for targets in classes:
+                table.append(targets[i] * width)
+            # symbols outside the alphabet leave the state unchanged
+            table.append(i * width)
+
+        return CompiledDFA(
+            labels=tuple(labels),
+            columns=columns,
+            width=width,
+            table=table,
+            final=bytes(state in self.F for state in labels),
+        )
+
+    def accept_many(self, words: Iterable[str]):
+        """
+        Check many words at once, see CompiledDFA.accept_many.
+        """
+        return self.compile().accept_many(words)
+
+    def accept_file(self, path: str | os.PathLike) -> bool:
+        """
+        Check the contents of a file without reading it into memory, see CompiledDFA.accept_file.
+        """
+        return self.compile().accept_file(path)
+
+    def runner(self) -> DFARunner[STATE]:
+        """
+        Start a resumable run that is fed the word chunk by chunk.
+        """
+        return self.compile().runner()
+
+    def equivalent(self, other: 'DFA') -> bool:
+        """
+        Check if two DFAs accept the same language, see distinguishing_word.
+        """
+        return self.distinguishing_word(other) is None
+
+    def distinguishing_word(self, other: 'DFA') -> str | None:
+        """
+        Hopcroft-Karp equivalence check: pairs of states are merged with union-find in BFS order,
+        without building the product automaton.
+        :param other: The DFA to compare with. Missing transitions leave the state unchanged, as in accept.
+        :return: A shortest word accepted by exactly one of the DFAs, or None if they are equivalent.
+        """
+        symbols = list(self.S | other.S)
+        parent = {}
+
+        def find(x):
+            root = x
+            while root in parent:
+                root = parent[root]
+            while x != root:
+                parent[x], x = root, parent[x]
+            return root
+
+        start = (self.q0, other.q0)
+        if (self.q0 in self.F) != (other.q0 in other.F):
+            return ''
+        parent[(1, other.q0)] = (0, self.q0)
+
+        previous = {start: None}
+        queue = deque([start])
+        while queue:
+            pair = queue.popleft()
+            p, q = pair
+            for symbol in symbols:
+                p1 = self.d.get((p, symbol), p)
+                q1 = other.d.get((q, symbol), q)
+                r1 = find((0, p1))
+                r2 = find((1, q1))
+                if r1 == r2:
+                    continue
+
+                if (p1 in self.F) != (q1 in other.F):
+                    word = [symbol]
+                    while previous[pair] is not None:
+                        pair, symbol = previous[pair]
+                        word.append(symbol)
+                    return ''.join(reversed(word))
+
+                parent[r2] = r1
+                previous[(p1, q1)] = (pair, symbol)
+                queue.append((p1, q1))
+
+        return None
+
+    def is_empty(self) -> bool:
+        return self.compile().is_empty()
+
+    def shortest_word(self) -> str | None:
+        return self.compile().shortest_word()
+
+    def is_finite(self) -> bool:
+        return self.compile().is_finite()
+
+    def max_word_length(self) -> int | float | None:
+        return self.compile().max_word_length()
+
+    def intersection(self, other: 'DFA') -> 'LazyProduct':
+        return LazyProduct(self, other, operator.and_)
+
+    def union(self, other: 'DFA') -> 'LazyProduct':
+        return LazyProduct(self, other, operator.or_)
+
+    def difference(self, other: 'DFA') -> 'LazyProduct':
+        return LazyProduct(self, other, lambda left, right: left and not right)
+
+    def symmetric_difference(self, other: 'DFA') -> 'LazyProduct':
+        return LazyProduct(self, other, operator.xor)
+
     def remap_states[OTHER_STATE](self, f: Callable[[STATE], 'OTHER_STATE']) -> 'DFA[OTHER_STATE]':
-      
-        pass
+        """
+        Rename every state to f(state).
+        """
+        return DFA(
+            S=self.S,
+            K={f(state) for state in self.K},
+            q0=f(self.q0),
+            d={(f(state), symbol): f(target) for (state, symbol), target in self.d.items()},
+            F={f(state) for state in self.F}
+        )
+
+    def canonicalize(self, keep_labels: bool = False) -> 'DFA[int] | tuple[DFA[int], list[STATE]]':
+        """
+        Number the reachable states 0..n-1 in BFS order from q0, taking the symbols in sorted order.
+        Unreachable states are dropped.
+        :param keep_labels: Also return the list that maps every new state to the original one.
+        """
+        index = {self.q0: 0}
+        labels = [self.q0]
+        symbols = sorted(self.S)
+        for state in labels:
+            for symbol in symbols:
+                target = self.d.get((state, symbol))
+                if target is not None and target not in index:
+                    index[target] = len(labels)
+                    labels.append(target)
+
+        dfa = DFA(
+            S=set(self.S),
+            K=set(range(len(labels))),
+            q0=0,
+            d={(index[state], symbol): index[target]
+               for (state, symbol), target in self.d.items() if state in index},
+            F={index[state] for state in self.F if state in index}
+        )
+        if keep_labels:
+            return dfa, labels
+        return dfa
     
     
-    def minimize(self) -> 'DFA':
+    def minimize(self, algorithm: str = 'hopcroft') -> 'DFA':
+        """
+        Merge the states that accept the same language.
+        :param algorithm: 'hopcroft' for partition refinement, 'table' for the pairwise table-filling method.
+        :return: The minimal DFA, whose states are frozensets of equivalent states of this DFA.
+        """
+        if algorithm == 'hopcroft':
+            return self._minimize_hopcroft()
+        if algorithm == 'table':
+            return self._minimize_table()
+        raise ValueError(f'unknown minimization algorithm: {algorithm}')
+
+    def _minimize_hopcroft(self) -> 'DFA':
+        states = list(self.K)
+        index = {state: i for i, state in enumerate(states)}
+        symbols = list(self.S)
+
+        # inverse[k][t] lists the states that reach t on symbols[k]
+        # (a missing transition leaves the state unchanged, as in accept)
+        inverse = []
+        for symbol in symbols:
+            inv = [[] for _ in states]
+            for i, state in enumerate(states):
+                inv[index[self.d.get((state, symbol), state)]].append(i)
+            inverse.append(inv)
+
+        final = {i for i, state in enumerate(states) if state in self.F}
+        blocks = [block for block in (set(final), set(range(len(states))) - final) if block]
+        block_of = [0] * len(states)
+        for b, block in enumerate(blocks):
+            for i in block:
+                block_of[i] = b
+
+        worklist = [min(range(len(blocks)), key=lambda b: len(blocks[b]))] if blocks else []
+        waiting = set(worklist)
+
+        while worklist:
+            b = worklist.pop()
+            waiting.discard(b)
+            splitter = list(blocks[b])
+
+            for inv in inverse:
+                hits = {}
+                for t in splitter:
+                    for s in inv[t]:
+                        hits.setdefault(block_of[s], set()).add(s)
+
+                for y, hit in hits.items():
+                    block = blocks[y]
+                    if len(hit) == len(block):
+                        continue
+
+                    # the states that reach the splitter move to a new block
+                    block -= hit
+                    new = len(blocks)
+                    blocks.append(hit)
+                    for s in hit:
+                        block_of[s] = new
+
+                    if y in waiting or len(hit) <= len(block):
+                        worklist.append(new)
+                        waiting.add(new)
+                    else:
+                        worklist.append(y)
+                        waiting.add(y)
+
+        groups = [frozenset(states[i] for i in block) for block in blocks]
+
+        transitions = {}
+        for block, group in zip(blocks, groups):
+            state = states[next(iter(block))]
+            for alphabet in self.S:
+                target = self.d.get((state, alphabet), state)
+                transitions[(group, alphabet)] = groups[block_of[index[target]]]
+
+        return DFA(
+            S=self.S,
+            K=set(groups),
+            q0=groups[block_of[index[self.q0]]],
+            d=transitions,
+            F={groups[block_of[i]] for i in final}
+        )
+
+    def _minimize_table(self) -> 'DFA':
         states_l = list(self.K)
 
 
@@ -107,4 +379,68 @@ class DFA[STATE]:
         )
 
 
-        
\ No newline at end of file
+class LazyProduct[LEFT, RIGHT]:
+    """
+    Product of two DFAs whose states (pairs of states) are only built when a run or a search reaches them.
+    """
+
+    def __init__(self, left: DFA[LEFT], right: DFA[RIGHT], accepting: Callable[[bool, bool], bool]) -> None:
+        """
+        :param accepting: Combines the acceptance of the two components, e.g. operator.and_ for intersection.
+        """
+        self.left = left
+        self.right = right
+        self.accepting = accepting
+        self.S = left.S | right.S
+        self.q0 = (left.q0, right.q0)
+        self.d = {}  # Transitions discovered so far
+
+    def step(self, pair: tuple[LEFT, RIGHT], symbol: str) -> tuple[LEFT, RIGHT]:
+        target = self.d.get((pair, symbol))
+        if target is None:
+            p, q = pair
+            target = (self.left.d.get((p, symbol), p), self.right.d.get((q, symbol), q))
+            self.d[(pair, symbol)] = target
+        return target
+
+    def is_final(self, pair: tuple[LEFT, RIGHT]) -> bool:
+        p, q = pair
+        return bool(self.accepting(p in self.left.F, q in self.right.F))
+
+    def accept(self, word: str) -> bool:
+        pair = self.q0
+        for ch in word:
+            if ch in self.S:
+                pair = self.step(pair, ch)
+        return self.is_final(pair)
+
+    def reachable(self) -> Iterable[tuple[LEFT, RIGHT]]:
+        """
+        Yield the reachable pairs in BFS order, exploring only as far as the caller iterates.
+        """
+        visited = {self.q0}
+        queue = deque([self.q0])
+        while queue:
+            pair = queue.popleft()
+            yield pair
+            for symbol in self.S:
+                target = self.step(pair, symbol)
+                if target not in visited:
+                    visited.add(target)
+                    queue.append(target)
+
+    def is_empty(self) -> bool:
+        return not any(self.is_final(pair) for pair in self.reachable())
+
+    def materialize(self) -> DFA[int]:
+        """
+        Build the reachable part of the product as a DFA whose states are numbered 0..n-1 in BFS order.
+        """
+        index = {pair: i for i, pair in enumerate(self.reachable())}
+        return DFA(
+            S=set(self.S),
+            K=set(index.values()),
+            q0=0,
+            d={(i, symbol): index[self.step(pair, symbol)] for pair, i in index.items() for symbol in self.S},
+            F={i for pair, i in index.items() if self.is_final(pair)},
+        )
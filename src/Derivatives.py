@@ -0,0 +1,158 @@
+from .DFA import DFA
+
+EMPTY = 0  # The term of the empty language
+EPSILON = 1  # The term of the empty word
+
+
+class Terms:
+    """
+    Hash-consed regex terms for Brzozowski derivatives. Every distinct term is an int id,
+    nodes are ('symbols', chars), ('cat', left, right), ('alt', alternatives) and ('star', term).
+    The constructors normalize the terms (ACI of union, empty set and empty word absorption),
+    so equivalent derivatives usually get the same id, and every derivative is computed once.
+    """
+
+    def __init__(self) -> None:
+        self.nodes = [('empty',), ('epsilon',)]
+        self.ids = {node: i for i, node in enumerate(self.nodes)}
+        self.nullable = [False, True]
+        self.derivatives = {}  # (term, symbol) -> term
+
+    def intern(self, node: tuple, nullable: bool) -> int:
+        term = self.ids.get(node)
+        if term is None:
+            term = self.ids[node] = len(self.nodes)
+            self.nodes.append(node)
+            self.nullable.append(nullable)
+        return term
+
+    def symbols(self, chars: frozenset[str]) -> int:
+        if not chars:
+            return EMPTY
+        return self.intern(('symbols', chars), False)
+
+    def cat(self, *terms: int) -> int:
+        """
+        Concatenation of the terms, nested to the right: (a b) c -> a (b c).
+        """
+        if EMPTY in terms:
+            return EMPTY
+
+        factors = []
+        for term in terms[:-1]:
+            # the first factor of a cat is never a cat, so its chain is unrolled along the right side
+            while self.nodes[term][0] == 'cat':
+                factors.append(self.nodes[term][1])
+                term = self.nodes[term][2]
+            if term != EPSILON:
+                factors.append(term)
+
+        result = terms[-1]  # already nested to the right if it is a cat
+        for factor in reversed(factors):
+            if result == EPSILON:
+                result = factor
+            else:
+                result = self.intern(('cat', factor, result), self.nullable[factor] and self.nullable[result])
+        return result
+
+    def alt(self, *terms: int) -> int:
+        alternatives = set()
+        for term in terms:
+            node = self.nodes[term]
+            if node[0] == 'alt':
+                alternatives.update(node[1])
+            elif term != EMPTY:
+                alternatives.add(term)
+
+        if not alternatives:
+            return EMPTY
+        if len(alternatives) == 1:
+            return alternatives.pop()
+        alternatives = frozenset(alternatives)
+        return self.intern(('alt', alternatives), any(self.nullable[term] for term in alternatives))
+
+    def star(self, term: int) -> int:
+        if term in (EMPTY, EPSILON):
+            return EPSILON
+        if self.nodes[term][0] == 'star':
+            return term
+        return self.intern(('star', term), True)
+
+    def derivative(self, term: int, symbol: str) -> int:
+        key = (term, symbol)
+        result = self.derivatives.get(key)
+        if result is not None:
+            return result
+
+        node = self.nodes[term]
+        kind = node[0]
+        if kind == 'symbols':
+            result = EPSILON if symbol in node[1] else EMPTY
+        elif kind == 'cat':
+            # d(a b) = d(a) b | d(b) if a is nullable. The suffixes of the chain whose derivatives are
+            # needed are collected first and derived from the innermost one, without recursing along b
+            chain = []
+            rest = term
+            while self.nodes[rest][0] == 'cat' and (rest, symbol) not in self.derivatives:
+                chain.append(rest)
+                first, rest = self.nodes[rest][1:]
+                if not self.nullable[first]:
+                    rest = None
+                    break
+
+            result = self.derivative(rest, symbol) if rest is not None else EMPTY
+            for suffix in reversed(chain):
+                _, first, rest = self.nodes[suffix]
+                derivative = self.cat(self.derivative(first, symbol), rest)
+                result = self.alt(derivative, result) if self.nullable[first] else derivative
+                self.derivatives[(suffix, symbol)] = result
+        elif kind == 'alt':
+            result = self.alt(*(self.derivative(alternative, symbol) for alternative in node[1]))
+        elif kind == 'star':
+            result = self.cat(self.derivative(node[1], symbol), term)
+        else:
+            result = EMPTY
+
+        self.derivatives[key] = result
+        return result
+
+    def alphabet(self, term: int) -> set[str]:
+        S = set()
+        seen = {term}
+        stack = [term]
+        while stack:
+            node = self.nodes[stack.pop()]
+            if node[0] == 'symbols':
+                S.update(node[1])
+                continue
+            children = node[1] if node[0] == 'alt' else node[1:]
+            for child in children:
+                if child not in seen:
+                    seen.add(child)
+                    stack.append(child)
+        return S
+
+    def to_dfa(self, term: int) -> DFA[int]:
+        """
+        Explore the distinct derivatives of a term in BFS order. The states are numbered 0..n-1,
+        the empty language is the sink state.
+        """
+        S = self.alphabet(term)
+        index = {term: 0}
+        terms = [term]
+        d = {}
+        for current in terms:
+            for symbol in S:
+                target = self.derivative(current, symbol)
+                if target not in index:
+                    index[target] = len(terms)
+                    terms.append(target)
+                d[(index[current], symbol)] = index[target]
+
+        return DFA(
+            S=S,
+            K=set(range(len(terms))),
+            q0=0,
+            d=d,
+            F={i for i, current in enumerate(terms) if self.nullable[current]},
+        )
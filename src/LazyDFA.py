@@ -0,0 +1,92 @@
+from typing import Generic, TypeVar
+
+from .BitsetNFA import BitsetNFA
+from .NFA import NFA
+
+STATE = TypeVar('STATE')
+
+
+class LazyDFA(Generic[STATE]):
+    """
+    DFA built while scanning: its states are the bitmasks of BitsetNFA and a transition is only
+    computed the first time a run takes it. At most max_states states are cached, the cache is
+    cleared when it is full. If it fills up again too soon, the word is finished by NFA simulation.
+    """
+
+    def __init__(self, nfa: NFA[STATE] | BitsetNFA[STATE], max_states: int = 10000, min_progress: int = 10) -> None:
+        """
+        :param max_states: Maximum number of cached DFA states.
+        :param min_progress: Characters to scan per cached state between two flushes, below this the cache
+                             is thrashing and the rest of the word is simulated on the NFA.
+        """
+        self.nfa = nfa.bitset() if isinstance(nfa, NFA) else nfa
+        self.max_states = max_states
+        self.min_progress = min_progress
+        self.transitions = {}  # mask -> {symbol: target mask}
+
+        self.hits = 0
+        self.misses = 0
+        self.flushes = 0
+        self.fallbacks = 0
+        self._scanned = 0  # Characters scanned since the last flush
+
+    def __len__(self) -> int:
+        return len(self.transitions)
+
+    def _state(self, mask: int, scanned: int = 0) -> dict[str, int] | None:
+        # the transitions of a state, adding it to the cache; None if the cache is thrashing.
+        # scanned is the number of characters the current run has scanned so far
+        row = self.transitions.get(mask)
+        if row is not None:
+            return row
+
+        if len(self.transitions) >= self.max_states:
+            thrashing = self._scanned + scanned < self.min_progress * self.max_states
+            self.transitions.clear()
+            self.flushes += 1
+            self._scanned = -scanned  # the run adds its whole count when it ends
+            if thrashing:
+                return None
+
+        row = self.transitions[mask] = {}
+        return row
+
+    def run(self, word: str, mask: int | None = None) -> int:
+        """
+        Run over a word.
+        :param mask: The state to start from, the closure of the initial NFA state by default.
+        :return: The state (bitmask of NFA states) reached after the word, 0 once the run is dead.
+        """
+        if mask is None:
+            mask = self.nfa.start
+
+        row = self._state(mask)
+        misses = 0
+        scanned = 0
+        for ch in word:
+            if row is None:
+                self.fallbacks += 1
+                mask = self.nfa.run(word[scanned:], mask)
+                break
+
+            target = row.get(ch)
+            if target is None:
+                misses += 1
+                target = self.nfa.step(mask, ch)
+                row[ch] = target
+                row = self._state(target, scanned)
+            else:
+                row = self.transitions.get(target) or self._state(target, scanned)
+
+            mask = target
+            scanned += 1
+            if not mask:
+                break
+
+        self.misses += misses
+        self.hits += scanned - misses
+        self._scanned += scanned
+        return mask
+
+    def accept(self, word: str) -> bool:
+        return bool(self.run(word) & self.nfa.final)
@@ -1,6 +1,7 @@
+from .BitsetNFA import BitsetNFA
 from .DFA import DFA
 from dataclasses import dataclass
-from collections.abc import Callable
+from collections.abc import Callable, Iterable
 from typing import TypeVar, Generic
 
 EPSILON = ''  # This is how epsilon is represented in the transition function of NFAs
@@ -36,69 +37,299 @@ class NFA(Generic[STATE]):
                     stack.append(elem)
         return closure
 
-    def subset_construction(self) -> DFA[frozenset[STATE]]:
+    def __setattr__(self, name, value) -> None:
+        super().__setattr__(name, value)
+        if name in ('S', 'K', 'q0', 'd', 'F'):
+            self.invalidate()
 
-        states = []
-        states_f = set()
-        transitions = {}
+    def invalidate(self) -> None:
+        """
+        Drop the data cached on this NFA. Assigning any of its fields does it automatically,
+        it only has to be called after changing S, K, d or F in place.
+        """
+        self.__dict__.pop('_cache', None)
+
+    def epsilon_closures(self) -> dict[STATE, frozenset[STATE]]:
+        """
+        Compute the epsilon closures of all the states at once. The strongly connected components of
+        the epsilon transitions are found with Tarjan's algorithm, they come out in reverse topological order,
+        so every component is closed using the already computed closures of its successors.
+        The states of a component share the same closure. The result is cached on the NFA.
+        :return: A dict mapping every state to its epsilon closure.
+        """
+        cache = self.__dict__.setdefault('_cache', {})
+        if 'closures' in cache:
+            return cache['closures']
+
+        def epsilon(state):
+            return self.d.get((state, EPSILON), ())
+
+        closures = {}
+        index = {}
+        low = {}
+        stack = []
+        on_stack = set()
+
+        for root in self.K | {state for state, _ in self.d}:
+            if root in index:
+                continue
 
-        l = []
-        l.append(frozenset(self.epsilon_closure(self.q0)))
-        current1 = []
-   
-        t1 = True
-        
-        for c in l:
-            
-            for alphabet in self.S:
-                epsilon = []
-                for state in c:
-                    if self.d.get((state,alphabet)) is not None:
-                        t = list(self.d.get((state,alphabet)))
-                        for i in range(len(t)):
-                            for target1 in self.epsilon_closure(t[i]):
-                                if target1 not in epsilon:
-                                    epsilon.append(target1)
-
-                if frozenset(set(epsilon)) != frozenset():
-                 
-                    if frozenset(set(epsilon)) not in current1:
-                        l.append(frozenset(set(epsilon)))
-            if c not in current1:
-                current1.append(c)
-
-       
-        for current in current1:
-            for alphabet in self.S:
-                epsilon = []
-                for state in current:
-                    if self.d.get((state,alphabet)) is not None:
-                        t = list(self.d.get((state,alphabet)))
-                        for i in range(len(t)):
-                            for target1 in self.epsilon_closure(t[i]):
-                                if target1 not in epsilon:
-                                    epsilon.append(target1)
-                if frozenset(set(epsilon)) == frozenset():
-                    transitions[(current, alphabet)] = frozenset({'x'})
-                    if frozenset({'x'}) not in states:
-                        states.append(frozenset({'x'}))
-                        for alphabet in self.S:
-                            transitions[(frozenset({'x'}), alphabet)] = frozenset({'x'})
+            index[root] = low[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(epsilon(root)))]
+
+            while work:
+                state, targets = work[-1]
+                for target in targets:
+                    if target not in index:
+                        index[target] = low[target] = len(index)
+                        stack.append(target)
+                        on_stack.add(target)
+                        work.append((target, iter(epsilon(target))))
+                        break
+                    if target in on_stack:
+                        low[state] = min(low[state], index[target])
                 else:
-                    transitions[(current, alphabet)] = frozenset(set(epsilon))
-            states.append(current)
-        
-        for current in current1:
-            for state in current:
-                if state in self.F:
-                    states_f.add(current)
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[state])
+                    if low[state] != index[state]:
+                        continue
+
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == state:
+                            break
+
+                    closure = set(component)
+                    for member in component:
+                        for target in epsilon(member):
+                            if target not in closure:
+                                closure |= closures[target]
+                    closure = frozenset(closure)
+                    for member in component:
+                        closures[member] = closure
+
+        cache['closures'] = closures
+        return closures
+
+    def closure_of_set(self, states: Iterable[STATE]) -> frozenset[STATE]:
+        """
+        Union of the epsilon closures of some states.
+        """
+        closures = self.epsilon_closures()
+        return frozenset().union(*(closures[state] for state in states))
+
+    def remove_epsilons(self) -> 'NFA[STATE]':
+        """
+        Build an equivalent NFA without epsilon transitions: every state gets the transitions and the
+        finality of the states in its epsilon closure. States that are no longer reachable are dropped.
+        """
+        closures = self.epsilon_closures()
+
+        moves = {}
+        for (state, symbol), targets in self.d.items():
+            if symbol != EPSILON:
+                moves.setdefault(state, []).append((symbol, targets))
+
+        d = {}
+        F = set()
+        reachable = [self.q0]
+        visited = {self.q0}
+        for state in reachable:
+            closure = closures[state]
+            if not closure.isdisjoint(self.F):
+                F.add(state)
+
+            for member in closure:
+                for symbol, targets in moves.get(member, ()):
+                    d.setdefault((state, symbol), set()).update(targets)
+
+            for symbol in self.S:
+                for target in d.get((state, symbol), ()):
+                    if target not in visited:
+                        visited.add(target)
+                        reachable.append(target)
+
+        return NFA(S=self.S, K=visited, q0=self.q0, d=d, F=F)
+
+    def reduce(self) -> 'NFA[STATE]':
+        """
+        Merge the states that are forward bisimilar (same finality, transitions into the same blocks),
+        then the ones that are backward bisimilar (both initial or not, transitions from the same blocks).
+        Epsilon is treated as an ordinary label, so the language does not change.
+        """
+        return self._merge_bisimilar(backward=False)._merge_bisimilar(backward=True)
+
+    def _merge_bisimilar(self, backward: bool) -> 'NFA[STATE]':
+        # Worklist partition refinement: when some states change block, only the blocks of their
+        # predecessors are re-split, and the largest part of a split block keeps its id, so a state
+        # changes block O(log |K|) times
+        successors = {state: [] for state in self.K}
+        predecessors = {state: [] for state in self.K}
+        for (state, symbol), targets in self.d.items():
+            for target in targets:
+                source, target = (target, state) if backward else (state, target)
+                successors[source].append((symbol, target))
+                predecessors[target].append(source)
+
+        marked = {self.q0} if backward else self.F
+        block = {state: int(state in marked) for state in self.K}
+        members = [set(), set()]
+        for state, b in block.items():
+            members[b].add(state)
+
+        pending = [list(self.K)]  # Groups of states that changed block
+        while pending:
+            splits = {}  # block -> {signature: states}
+            seen = set()
+            for state in pending.pop():
+                for source in predecessors[state]:
+                    if source not in seen:
+                        seen.add(source)
+                        signature = frozenset((symbol, block[other]) for symbol, other in successors[source])
+                        splits.setdefault(block[source], {}).setdefault(signature, []).append(source)
+
+            for b, groups in splits.items():
+                groups = list(groups.values())
+                unchanged = len(members[b]) - sum(map(len, groups))
+                if not unchanged and len(groups) == 1:
+                    continue
+
+                largest = max(groups, key=len)
+                if unchanged < len(largest):
+                    # the predecessors are the majority, the states that kept their signature move out
+                    rest = members[b].difference(*groups)
+                    groups = [group for group in groups if group is not largest] + ([list(rest)] if rest else [])
+
+                for group in groups:
+                    new = len(members)
+                    members.append(set(group))
+                    members[b].difference_update(group)
+                    for state in group:
+                        block[state] = new
+                    pending.append(group)
+
+        representative = {block[self.q0]: self.q0}
+        for state in self.K:
+            representative.setdefault(block[state], state)
+        return self.remap_states(lambda state: representative[block[state]])
+
+    def bitset(self) -> BitsetNFA[STATE]:
+        """
+        The NFA with its states numbered and its sets of states as int bitmasks, cached on the NFA.
+        """
+        cache = self.__dict__.setdefault('_cache', {})
+        if 'bitset' not in cache:
+            cache['bitset'] = BitsetNFA.from_nfa(self)
+        return cache['bitset']
+
+    def accept(self, word: str) -> bool:
+        """
+        Check a word by simulating the NFA on the set of active states, without determinizing it.
+        Runs in O(len(word) * |K|) time and O(|K|) memory.
+        """
+        return self.bitset().accept(word)
+
+    def run(self, stream: Iterable[str]) -> frozenset[STATE]:
+        """
+        Simulate the NFA over a word that arrives in chunks.
+        :return: The states that are active after the whole stream.
+        """
+        bitset = self.bitset()
+        mask = bitset.start
+        for chunk in stream:
+            mask = bitset.run(chunk, mask)
+            if not mask:
+                break
+        return bitset.states_of(mask)
+
+    def subset_construction(self, backend: str = 'sets', labels: str = 'frozenset', reduce: bool = False,
+                            workers: int | None = None, chunk_size: int = 256) -> DFA:
+        """
+        Determinize the NFA. Every reachable subset is expanded exactly once, subsets are looked up in a dict.
+        :param backend: 'sets' works on frozensets of states, 'bitset' on the int bitmasks of BitsetNFA.
+        :param labels: 'frozenset' or 'bitmask' (only with the bitset backend), see BitsetNFA.subset_construction.
+        :param reduce: Merge bisimilar states first (see reduce), which gives fewer and smaller subsets.
+        :param workers: Expand the subsets in a pool of this many processes (uses the bitset backend).
+        :param chunk_size: Number of subsets sent to a worker at once.
+        :return: A DFA whose states are epsilon-closed subsets of states. The empty subset is
+                 represented by the sink state frozenset({'x'}).
+        """
+        if backend not in ('sets', 'bitset'):
+            raise ValueError(f'unknown subset construction backend: {backend}')
+        if reduce:
+            return self.reduce().subset_construction(backend, labels, workers=workers, chunk_size=chunk_size)
+        if backend == 'bitset' or workers is not None:
+            return self.bitset().subset_construction(labels, workers, chunk_size)
+        if labels != 'frozenset':
+            raise ValueError(f'the sets backend only supports frozenset labels, not {labels}')
+
+        closures = self.epsilon_closures()
+
+        # moves[state] = [(symbol, closure of the targets on symbol), ...]
+        moves = {}
+        for (state, symbol), targets in self.d.items():
+            if symbol != EPSILON and symbol in self.S:
+                moves.setdefault(state, []).append((symbol, self.closure_of_set(targets)))
+
+        sink = frozenset({'x'})
+        start = closures[self.q0]
+        index = {start: 0}
+        subsets = [start]
+        transitions = {}
+        sink_used = False
+
+        for subset in subsets:
+            targets = {}
+            for state in subset:
+                for symbol, closure in moves.get(state, ()):
+                    targets.setdefault(symbol, set()).update(closure)
+
+            for symbol in self.S:
+                target = targets.get(symbol)
+                if not target:
+                    transitions[(subset, symbol)] = sink
+                    sink_used = True
+                    continue
+
+                target = frozenset(target)
+                if target not in index:
+                    index[target] = len(subsets)
+                    subsets.append(target)
+                transitions[(subset, symbol)] = target
+
+        states = set(subsets)
+        if sink_used:
+            states.add(sink)
+            for symbol in self.S:
+                transitions[(sink, symbol)] = sink
+
         return DFA(
             S=self.S,
-            K=set(states),
+            K=states,
             d=transitions,
-            q0=frozenset(self.epsilon_closure(self.q0)),
-            F=states_f,
+            q0=start,
+            F={subset for subset in subsets if not subset.isdisjoint(self.F)},
         )
 
     def remap_states(self, f: Callable[[STATE], OTHER_STATE]) -> 'NFA[OTHER_STATE]':
-        pass
+        """
+        Rename every state to f(state). States that f maps to the same name are merged.
+        """
+        d = {}
+        for (state, symbol), targets in self.d.items():
+            d.setdefault((f(state), symbol), set()).update(f(target) for target in targets)
+
+        return NFA(
+            S=self.S,
+            K={f(state) for state in self.K},
+            q0=f(self.q0),
+            d=d,
+            F={f(state) for state in self.F},
+        )
@@ -1,299 +1,494 @@
-from dataclasses import dataclass
+import inspect
+import weakref
+from dataclasses import dataclass, fields
 from typing import Union as TypingUnion
+from .BitsetNFA import bits
+from .Derivatives import EPSILON as EMPTY_WORD, Terms
+from .DFA import DFA
 from .NFA import NFA
 
 EPSILON = ''  # Epsilon transition representation
 
 class Regex:
+    """
+    Regex AST node. Nodes are immutable and hash-consed: building a node equal to a live one returns
+    that same object, so equal subtrees are shared and equality and hashing are by identity.
+    """
+    _nodes = weakref.WeakValueDictionary()  # (class, fields...) -> node
+
+    def __new__(cls, *args, **kwargs):
+        if kwargs:
+            args = tuple(inspect.signature(cls).bind(*args, **kwargs).arguments.values())
+
+        key = (cls, *args)
+        node = Regex._nodes.get(key)
+        if node is None:
+            node = super().__new__(cls)
+            Regex._nodes[key] = node
+        return node
+
+    def __reduce__(self):
+        # unpickling goes through __new__, so it gets the interned node
+        return type(self), tuple(getattr(self, field.name) for field in fields(self))
+
+    def __copy__(self) -> 'Regex':
+        return self
+
+    def __deepcopy__(self, memo) -> 'Regex':
+        return self
+
+    def simplify(self) -> 'Regex':
+        """
+        Rebuild the regex bottom-up with the simplifying constructors concat, union, star, plus and question.
+        """
+        results = []
+        stack = [(self, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if not expanded:
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(children(node)))
+                continue
+
+            if isinstance(node, Concat):
+                right = results.pop()
+                results.append(concat(results.pop(), right))
+            elif isinstance(node, Union):
+                right = results.pop()
+                results.append(union(results.pop(), right))
+            elif isinstance(node, Star):
+                results.append(star(results.pop()))
+            elif isinstance(node, Plus):
+                results.append(plus(results.pop()))
+            elif isinstance(node, Question_Mark):
+                results.append(question(results.pop()))
+            else:
+                results.append(node)
+        return results.pop()
+
     def thompson(self) -> NFA[int]:
-        raise NotImplementedError("Subclasses must implement the thompson method.")
+        """
+        Thompson construction in a single pass over the AST, see ThompsonBuilder.
+        """
+        return ThompsonBuilder().build(self)
+
+    def to_dfa_derivatives(self) -> DFA[int]:
+        """
+        Build a DFA directly from the regex: its states are the distinct (normalized) Brzozowski
+        derivatives of the regex, explored in BFS order, see Terms.
+        """
+        terms = Terms()
+        results = []
+        stack = [(self, None)]
+        while stack:
+            node, count = stack.pop()
+            if count is None:
+                # a chain of concatenations is built in one step from all its factors
+                parts = factors(node) if isinstance(node, Concat) else children(node)
+                stack.append((node, len(parts)))
+                stack.extend((child, None) for child in reversed(parts))
+                continue
+
+            if isinstance(node, Character):
+                results.append(terms.symbols(frozenset(node.char)))
+            elif isinstance(node, CharacterClass):
+                results.append(terms.symbols(frozenset(chr(c) for c in range(ord(node.start_char), ord(node.end_char) + 1))))
+            elif isinstance(node, Concat):
+                operands = results[-count:]
+                del results[-count:]
+                results.append(terms.cat(*operands))
+            elif isinstance(node, Union):
+                right = results.pop()
+                results.append(terms.alt(results.pop(), right))
+            elif isinstance(node, Star):
+                results.append(terms.star(results.pop()))
+            elif isinstance(node, Plus):
+                term = results.pop()
+                results.append(terms.cat(term, terms.star(term)))
+            elif isinstance(node, Question_Mark):
+                results.append(terms.alt(EMPTY_WORD, results.pop()))
+            else:
+                raise ValueError(f'unsupported regex: {node}')
+
+        return terms.to_dfa(results.pop())
+
+    def to_dfa_followpos(self) -> DFA[int]:
+        """
+        Build a DFA directly from the regex with the followpos method: the regex is followed by an end
+        marker and the DFA states are the sets of positions (as int bitmasks) that can match next.
+        A state is final if it contains the end marker, the empty set is the sink state 0.
+        """
+        positions = Positions.of(self)
+        end = 1 << len(positions.symbols)
+        follow = list(positions.follow)
+        for p in bits(positions.last):
+            follow[p] |= end
+
+        S = set().union(*positions.symbols)
+        matching = {symbol: 0 for symbol in S}  # Positions that match every symbol
+        for p, symbols in enumerate(positions.symbols):
+            for symbol in symbols:
+                matching[symbol] |= 1 << p
+
+        start = positions.first | end if positions.nullable else positions.first
+        states = [start]
+        seen = {start}
+        d = {}
+        for state in states:
+            for symbol in S:
+                target = 0
+                for p in bits(state & matching[symbol]):
+                    target |= follow[p]
+                if target not in seen:
+                    seen.add(target)
+                    states.append(target)
+                d[(state, symbol)] = target
+
+        return DFA(S=S, K=seen, q0=start, d=d, F={state for state in states if state & end})
+
+    def glushkov(self) -> NFA[int]:
+        """
+        Glushkov (position) automaton: one state per symbol occurrence plus the initial state 0,
+        no epsilon transitions. State p is reached by reading the symbol at position p.
+        """
+        positions = Positions.of(self)
+
+        S = set().union(*positions.symbols)
+        d = {}
 
-@dataclass
+        def add_moves(state: int, targets: int) -> None:
+            for p in bits(targets):
+                for symbol in positions.symbols[p]:
+                    d.setdefault((state, symbol), set()).add(p)
+
+        add_moves(0, positions.first)
+        for p in range(1, len(positions.symbols)):
+            add_moves(p, positions.follow[p])
+
+        F = set(bits(positions.last))
+        if positions.nullable:
+            F.add(0)
+        return NFA(S, set(range(len(positions.symbols))), 0, d, F)
+
+@dataclass(frozen=True, eq=False)
 class Character(Regex):
     char: str
 
-    def thompson(self) -> NFA[int]:
-        start_state = 0
-        accept_state = 1
-        S = {self.char}
-        K = {start_state, accept_state}
-        q0 = start_state
-        d = {(start_state, self.char): {accept_state}}
-        F = {accept_state}
-        return NFA(S, K, q0, d, F)
-
-@dataclass
+@dataclass(frozen=True, eq=False)
 class Concat(Regex):
     left: Regex
     right: Regex
 
-    def thompson(self) -> NFA[int]:
-        left_nfa = self.left.thompson()
-        right_nfa = self.right.thompson()
-
-        # Create a new NFA for concatenation
-        S = left_nfa.S | right_nfa.S  # Union of alphabets
-        K = set()  # Set of states for the resulting NFA
-        q0 = left_nfa.q0  # Start state is the same as the start state of the left NFA
-        d = {}  # Transition function
-        F = set()  # Set of final states for the resulting NFA
-
-        # Calculate an offset to avoid state conflicts
-        state_offset = max(left_nfa.K) + 1
-
-        # Map states for both NFAs
-        left_state_mapping = {state: state for state in left_nfa.K}
-        right_state_mapping = {state: state + state_offset for state in right_nfa.K}
-
-        # Add states from both NFAs
-        for state in left_state_mapping.values():
-            K.add(state)
-        for state in right_state_mapping.values():
-            K.add(state)
-
-        # Add transitions for the left NFA
-        for (from_state, symbol), to_states in left_nfa.d.items():
-            for to_state in to_states:
-                d[(left_state_mapping[from_state], symbol)] = {left_state_mapping[to_state]}
-
-        # Add transitions for the right NFA
-        for (from_state, symbol), to_states in right_nfa.d.items():
-            for to_state in to_states:
-                d[(right_state_mapping[from_state], symbol)] = {right_state_mapping[to_state]}
-
-        # Add epsilon transition from the final states of the left NFA to the start state of the right NFA
-        for accept_state in left_nfa.F:
-            d[(left_state_mapping[accept_state], EPSILON)] = {right_state_mapping[right_nfa.q0]}
-
-        # Set the start state
-        q0 = left_state_mapping[left_nfa.q0]
-
-        # Set the final states of the resulting NFA
-        for accept_state in right_nfa.F:
-            F.add(right_state_mapping[accept_state])
-
-        return NFA(S, K, q0, d, F)
-
-
-
-@dataclass
+@dataclass(frozen=True, eq=False)
 class Union(Regex):
     left: Regex
     right: Regex
 
-    def thompson(self) -> NFA[int]:
-        left_nfa = self.left.thompson()
-        right_nfa = self.right.thompson()
-
-        K = set()
-        d = {}
-        F = set()
-        S = left_nfa.S | right_nfa.S
-        q0 = 0
-
-        # Calculate a unique final state
-        final_state = max(left_nfa.K) + max(right_nfa.K) + 3
-        F.add(final_state)
-
-        # Add the start state (q0)
-        K.add(q0)
-        K.add(final_state)
-
-        # Left state mapping (offset by 1)
-        left_state_mapping = {state: state + 1 for state in left_nfa.K}
-
-        # Add states and transitions for the left NFA
-        for state in left_state_mapping.values():
-            K.add(state)
-
-        for (from_state, symbol), to_states in left_nfa.d.items():
-            for to_state in to_states:
-                d[(left_state_mapping[from_state], symbol)] = {left_state_mapping[to_state]}
-
-        # Right state mapping (offset by max(left_nfa.K) + 1)
-        right_state_offset = max(left_nfa.K) + 2
-        right_state_mapping = {state: state + right_state_offset for state in right_nfa.K}
-
-        # Add states and transitions for the right NFA
-        for state in right_state_mapping.values():
-            K.add(state)
-
-        for (from_state, symbol), to_states in right_nfa.d.items():
-            for to_state in to_states:
-                d[(right_state_mapping[from_state], symbol)] = {right_state_mapping[to_state]}
-
-        # Add epsilon transitions from start state to both NFA starts
-        d[(q0, EPSILON)] = {left_state_mapping[left_nfa.q0], right_state_mapping[right_nfa.q0]}
-
-        # Add epsilon transitions from accept states of both NFAs to the final accept state
-        for accept_state_left in left_nfa.F:
-            d[(left_state_mapping[accept_state_left], EPSILON)] = {final_state}
-        for accept_state_right in right_nfa.F:
-            d[(right_state_mapping[accept_state_right], EPSILON)] = {final_state}
-
-        return NFA(S, K, q0, d, F)
-
-@dataclass
+@dataclass(frozen=True, eq=False)
 class Question_Mark(Regex):
-
     regex: Regex
 
-    def thompson(self) -> NFA[int]:
-        base_nfa = self.regex.thompson()
-
-        # Create a new NFA for the QuestionMark operator
-        K = set()
-        d = {}
-        F = set()
-        S = base_nfa.S
-        state_offset = max(base_nfa.K) + 1  # Offset for new states
-
-        # Map states from the base NFA
-        state_mapping = {state: state + 1 for state in base_nfa.K}
-
-        # Add all states from the base NFA
-        for state in state_mapping.values():
-            K.add(state)
-
-        # Add transitions from the base NFA
-        for (from_state, symbol), to_states in base_nfa.d.items():
-            for to_state in to_states:
-                d[(state_mapping[from_state], symbol)] = {state_mapping[to_state]}
-
-        # Add a new start and accept state
-
-        #print(start_state)
-        start_state = 0
-        accept_state = state_offset + 1
-        K.add(start_state)
-        K.add(accept_state)
-
-        # Add epsilon transitions from the new start state to the base NFA start state and accept state
-        d[(start_state, EPSILON)] = {state_mapping[base_nfa.q0], accept_state}
-
-        # Add epsilon transitions from the final states of the base NFA to the new accept state
-        for accept_state_base in base_nfa.F:
-            d[(state_mapping[accept_state_base], EPSILON)] = {accept_state}
-
-        # Set the new start state and final state
-        q0 = start_state
-        F.add(accept_state)
-
-        return NFA(S, K, q0, d, F)
-
-
-@dataclass
+@dataclass(frozen=True, eq=False)
 class Plus(Regex):
     regex: Regex
 
-    def thompson(self) -> NFA[int]:
-        base_nfa = self.regex.thompson()
-        
-        # Create a new NFA for the Plus operator
-        K = set()
-        d = {}
-        F = set()
-        S = base_nfa.S
-        state_offset = max(base_nfa.K) + 1  # Offset for new states
-        
-        # Map states from the base NFA
-        state_mapping = {state: state + 1 for state in base_nfa.K}
-
-        # Add all states from the base NFA
-        for state in state_mapping.values():
-            K.add(state)
-
-        # Add transitions from the base NFA
-        for (from_state, symbol), to_states in base_nfa.d.items():
-            for to_state in to_states:
-                d[(state_mapping[from_state], symbol)] = {state_mapping[to_state]}
-
-        # Add a new start and accept state
-        start_state = 0
-        accept_state = state_offset + 1
-        K.add(start_state)
-        K.add(accept_state)
-
-        # Add epsilon transitions from the new start state to the base NFA start state
-        d[(start_state, EPSILON)] = {state_mapping[base_nfa.q0]}
-
-        for accept_state_base in base_nfa.F:
-            d[(state_mapping[accept_state_base], EPSILON)] = {state_mapping[base_nfa.q0]}
-
-        # Add epsilon transitions from the final states of the base NFA to the new accept state
-        for accept_state_base in base_nfa.F:
-            d[(state_mapping[accept_state_base], EPSILON)] = {accept_state}
-
-        # Set the new start state and final state
-        q0 = start_state
-        F.add(accept_state)
-
-        return NFA(S, K, q0, d, F)
-
-@dataclass
+@dataclass(frozen=True, eq=False)
 class CharacterClass(Regex):
-    def __init__(self, start_char: str, end_char: str):
-        self.start_char = start_char
-        self.end_char = end_char
+    start_char: str
+    end_char: str
 
-    def thompson(self) -> NFA[int]:
-        start_state = 0
-        accept_state = 1
-        S = set(chr(i) for i in range(ord(self.start_char), ord(self.end_char) + 1)) 
-        K = {start_state, accept_state}
-        q0 = start_state
-        d = {}
-        F = {accept_state}
-        for char in range(ord(self.start_char), ord(self.end_char) + 1):
-            d[(start_state, chr(char))] = {accept_state}
-
-        return NFA(S, K, q0, d, F)
-
-@dataclass
+@dataclass(frozen=True, eq=False)
 class Star(Regex):
     regex: Regex
-    def thompson(self) -> NFA[int]:
-        base_nfa = self.regex.thompson()
 
-        # Create a new NFA for the Star operator
-        K = set()
-        d = {}
-        F = set()
-        S = base_nfa.S
-        state_offset = max(base_nfa.K) + 1  # Offset for new states
-        
-        # Map states from the base NFA
-        state_mapping = {state: state + 1 for state in base_nfa.K}
 
-        # Add all states from the base NFA, remapped
-        for state in state_mapping.values():
-            K.add(state)
+def factors(regex: Regex) -> list[Regex]:
+    """
+    The operands of a chain of concatenations.
+    """
+    result = []
+    stack = [regex]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, Concat):
+            stack.append(node.right)
+            stack.append(node.left)
+        else:
+            result.append(node)
+    return result
+
+
+def concat(*regexes: Regex) -> Regex:
+    """
+    Concatenation, nested to the right.
+    """
+    result = regexes[-1]
+    for regex in reversed(regexes[:-1]):
+        result = Concat(regex, result)
+    return result
+
+
+def star(regex: Regex) -> Regex:
+    # (r*)* = (r+)* = (r?)* = r*
+    if isinstance(regex, Star):
+        return regex
+    if isinstance(regex, (Plus, Question_Mark)):
+        return star(regex.regex)
+    return Star(regex)
+
+
+def plus(regex: Regex) -> Regex:
+    # (r*)+ = r*, (r+)+ = r+, (r?)+ = r*
+    if isinstance(regex, (Star, Plus)):
+        return regex
+    if isinstance(regex, Question_Mark):
+        return star(regex.regex)
+    return Plus(regex)
+
+
+def question(regex: Regex) -> Regex:
+    # (r*)? = r*, (r?)? = r?, (r+)? = r*
+    if isinstance(regex, (Star, Question_Mark)):
+        return regex
+    if isinstance(regex, Plus):
+        return star(regex.regex)
+    return Question_Mark(regex)
+
+
+class _PrefixTrie:
+    # alternatives of a union sorted by their leading factors
+    def __init__(self) -> None:
+        self.children = {}  # factor -> _PrefixTrie of the alternatives that continue with it
+        self.count = 0  # Number of alternatives that reached this node
+        self.end = False  # Whether an alternative ends here
+        self.rest = None  # What follows the factor in the first alternative that reached this node
+
+
+def union(*regexes: Regex) -> Regex:
+    """
+    Union without duplicate alternatives, with the alternatives that start the same way factored
+    (ab | ac -> a(b | c), a | ab -> a(b)?) and the single characters merged into character classes.
+    The alternatives are put in a trie of their factors, built and folded with explicit stacks.
+    """
+    root = _PrefixTrie()
+    stack = [(root, regex) for regex in reversed(regexes)]
+    while stack:
+        trie, node = stack.pop()
+        if isinstance(node, Union):
+            # the alternatives of a tail are factored together with the other tails
+            stack.append((trie, node.right))
+            stack.append((trie, node.left))
+            continue
 
-        # Add transitions from the base NFA, remapped
-        for (from_state, symbol), to_states in base_nfa.d.items():
-            for to_state in to_states:
-                d[(state_mapping[from_state], symbol)] = {state_mapping[to_state]}
+        head, rest = (node.left, node.right) if isinstance(node, Concat) else (node, None)
+        child = trie.children.get(head)
+        if child is None:
+            child = trie.children[head] = _PrefixTrie()
+            child.rest = rest
+        child.count += 1
+        if rest is None:
+            child.end = True
+        else:
+            stack.append((child, rest))
+
+    # fold the trie bottom-up; a node reached by one alternative reuses its (interned) tail
+    results = {}
+    stack = [(root, False)]
+    while stack:
+        trie, expanded = stack.pop()
+        if not expanded:
+            stack.append((trie, True))
+            stack.extend((child, False) for child in trie.children.values() if child.count > 1 and child.children)
+            continue
 
-        # Add a new start and accept state
-        start_state = 0
-        accept_state = state_offset + 1
-        K.add(start_state)
-        K.add(accept_state)
+        factored = []
+        for head, child in trie.children.items():
+            if not child.children:
+                factored.append(head)
+            elif child.count == 1:
+                factored.append(Concat(head, child.rest))
+            else:
+                tail = results.pop(child)
+                factored.append(Concat(head, question(tail) if child.end else tail))
+        results[trie] = _merge_alternatives(factored)
+
+    return results[root]
+
+
+def _merge_alternatives(alternatives: list[Regex]) -> Regex:
+    # the union of the alternatives, with the characters and character classes merged into maximal ranges
+    codes = set()
+    others = []
+    for alternative in alternatives:
+        if isinstance(alternative, Character) and len(alternative.char) == 1:
+            codes.add(ord(alternative.char))
+        elif isinstance(alternative, CharacterClass):
+            codes.update(range(ord(alternative.start_char), ord(alternative.end_char) + 1))
+        else:
+            others.append(alternative)
+
+    ranges = []
+    for code in sorted(codes):
+        if ranges and ranges[-1][1] == code - 1:
+            ranges[-1][1] = code
+        else:
+            ranges.append([code, code])
+    merged = [Character(chr(start)) if start == end else CharacterClass(chr(start), chr(end)) for start, end in ranges]
 
-        # Add epsilon transitions from the new start state to the base NFA start state and accept state
-        d[(start_state, EPSILON)] = {state_mapping[base_nfa.q0], accept_state}
+    result = merged + others
+    node = result[-1]
+    for alternative in reversed(result[:-1]):
+        node = Union(alternative, node)
+    return node
 
-        # Add epsilon transitions from the final states of the base NFA to the start state (for repetition)
-        for accept_state_base in base_nfa.F:
-            # Add epsilon transition from base NFA's final state to the remapped start state
-            d[(state_mapping[accept_state_base], EPSILON)] = {state_mapping[base_nfa.q0], accept_state}
 
+def children(regex: Regex) -> tuple[Regex, ...]:
+    if isinstance(regex, (Concat, Union)):
+        return regex.left, regex.right
+    if isinstance(regex, (Star, Plus, Question_Mark)):
+        return (regex.regex,)
+    return ()
 
-        # Set the new start state and final state
-        q0 = start_state
-        F.add(accept_state)
 
-        return NFA(S, K, q0, d, F)
+@dataclass
+class Positions:
+    """
+    Position analysis of a regex, every set of positions is an int bitmask.
+    The symbol occurrences are the positions 1..n, position 0 is unused.
+    """
+    symbols: list[set[str]]  # symbols[p] are the symbols matched at position p (a character class is one position)
+    nullable: bool  # The regex matches the empty word
+    first: int  # Positions that can match the first symbol of a word
+    last: int  # Positions that can match the last symbol of a word
+    follow: list[int]  # follow[p] are the positions that can come right after position p
+
+    @classmethod
+    def of(cls, regex: Regex) -> 'Positions':
+        symbols = [set()]
+        follow = [0]
+        results = []  # (nullable, first, last) of every analysed subexpression
+
+        def link(last: int, first: int) -> None:
+            for p in bits(last):
+                follow[p] |= first
+
+        stack = [(regex, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if not expanded:
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(children(node)))
+                continue
+
+            if isinstance(node, (Character, CharacterClass)):
+                if isinstance(node, Character):
+                    symbols.append({node.char})
+                else:
+                    symbols.append({chr(c) for c in range(ord(node.start_char), ord(node.end_char) + 1)})
+                follow.append(0)
+                position = 1 << (len(symbols) - 1)
+                results.append((False, position, position))
+            elif isinstance(node, (Concat, Union)):
+                right_nullable, right_first, right_last = results.pop()
+                left_nullable, left_first, left_last = results.pop()
+                if isinstance(node, Union):
+                    results.append((left_nullable or right_nullable, left_first | right_first, left_last | right_last))
+                else:
+                    link(left_last, right_first)
+                    results.append((
+                        left_nullable and right_nullable,
+                        left_first | right_first if left_nullable else left_first,
+                        left_last | right_last if right_nullable else right_last,
+                    ))
+            elif isinstance(node, (Star, Plus, Question_Mark)):
+                nullable, first, last = results.pop()
+                if not isinstance(node, Question_Mark):
+                    link(last, first)
+                results.append((nullable or not isinstance(node, Plus), first, last))
+            else:
+                raise ValueError(f'unsupported regex: {node}')
+
+        nullable, first, last = results.pop()
+        return cls(symbols, nullable, first, last, follow)
+
+
+class ThompsonBuilder:
+    """
+    Builds the Thompson NFA of a regex in O(n): the states come from one shared counter and the
+    transitions go into one table, instead of every node copying and renumbering the NFAs of its children.
+    The AST is walked with an explicit stack, so deep regexes do not hit the recursion limit.
+    """
+
+    def __init__(self) -> None:
+        self.states = 0  # Number of allocated states, they are 0..states-1
+        self.S = set()
+        self.d = {}
+
+    def new_state(self) -> int:
+        self.states += 1
+        return self.states - 1
+
+    def add(self, state: int, symbol: str, target: int) -> None:
+        self.d.setdefault((state, symbol), set()).add(target)
+        if symbol != EPSILON:
+            self.S.add(symbol)
+
+    def build(self, regex: Regex) -> NFA[int]:
+        fragments = []  # (start, accept) of every built subexpression
+        stack = [(regex, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if not expanded:
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(children(node)))
+                continue
+
+            if isinstance(node, (Concat, Union)):
+                right = fragments.pop()
+                left = fragments.pop()
+                fragments.append(self.binary(node, left, right))
+            elif isinstance(node, (Star, Plus, Question_Mark)):
+                fragments.append(self.unary(node, fragments.pop()))
+            else:
+                fragments.append(self.leaf(node))
+
+        start, accept = fragments.pop()
+        return NFA(self.S, set(range(self.states)), start, self.d, {accept})
+
+    def leaf(self, node: Regex) -> tuple[int, int]:
+        start = self.new_state()
+        accept = self.new_state()
+        if isinstance(node, Character):
+            self.add(start, node.char, accept)
+        elif isinstance(node, CharacterClass):
+            for char in range(ord(node.start_char), ord(node.end_char) + 1):
+                self.add(start, chr(char), accept)
+        else:
+            raise ValueError(f'unsupported regex: {node}')
+        return start, accept
+
+    def binary(self, node: Regex, left: tuple[int, int], right: tuple[int, int]) -> tuple[int, int]:
+        if isinstance(node, Concat):
+            self.add(left[1], EPSILON, right[0])
+            return left[0], right[1]
+
+        start = self.new_state()
+        accept = self.new_state()
+        for fragment in (left, right):
+            self.add(start, EPSILON, fragment[0])
+            self.add(fragment[1], EPSILON, accept)
+        return start, accept
+
+    def unary(self, node: Regex, fragment: tuple[int, int]) -> tuple[int, int]:
+        start = self.new_state()
+        accept = self.new_state()
+        self.add(start, EPSILON, fragment[0])
+        self.add(fragment[1], EPSILON, accept)
+        if isinstance(node, (Star, Question_Mark)):
+            self.add(start, EPSILON, accept)
+        if isinstance(node, (Star, Plus)):
+            self.add(fragment[1], EPSILON, fragment[0])
+        return start, accept
 
 
 def parse_regex(regex: str) -> Regex:
@@ -0,0 +1,100 @@
+from collections.abc import Callable
+from typing import TextIO, TypeVar
+
+from .DFA import DFA
+
+STATE = TypeVar('STATE')
+
+# Symbols that are escaped in the #alphabet and #transitions sections
+ESCAPES = {'\\n': '\n', '\\t': '\t', '\\\\': ' '}
+UNESCAPES = {symbol: escaped for escaped, symbol in ESCAPES.items()}
+
+SECTIONS = ['#states', '#initial', '#accepting', '#alphabet', '#transitions']
+
+
+def read_dfa(f: TextIO, keep_labels: bool = False) -> DFA[int] | tuple[DFA[int], list[str]]:
+    """
+    Read a DFA in the #states/#initial/#accepting/#alphabet/#transitions text format, one line at a time.
+    :param f: A file opened in text mode.
+    :param keep_labels: Also return the list that maps every state id to its name in the file.
+    :return: A DFA whose states are numbered 0..n-1 in the order of the #states section.
+    """
+    labels = []
+    index = {}
+    q0 = None
+    F = set()
+    S = set()
+    d = {}
+
+    section = None
+    for line in f:
+        line = line.rstrip('\r\n')
+        if line in SECTIONS:
+            section = line
+            continue
+
+        if section == '#alphabet':
+            if line:
+                S.add(ESCAPES.get(line, line))
+            continue
+
+        line = line.strip()
+        if not line:
+            continue
+
+        if section == '#states':
+            index[line] = len(labels)
+            labels.append(line)
+        elif section == '#initial':
+            q0 = index[line]
+        elif section == '#accepting':
+            F.add(index[line])
+        elif section == '#transitions':
+            # state:symbol>target, where the state name may itself contain ':'
+            i = line.find(':')
+            while line[:i] not in index:
+                i = line.find(':', i + 1)
+                if i == -1:
+                    raise ValueError(f'invalid transition: {line}')
+            rest = line[i + 1:]
+            symbol = ESCAPES.get(rest[:2])
+            if symbol is None or symbol not in S:
+                symbol = rest[0]
+                rest = rest[1:]
+            else:
+                rest = rest[2:]
+            if not rest.startswith('>'):
+                raise ValueError(f'invalid transition: {line}')
+            d[(index[line[:i]], symbol)] = index[rest[1:]]
+        else:
+            raise ValueError('invalid file format')
+
+    if q0 is None:
+        raise ValueError('invalid file format')
+
+    dfa = DFA(S=S, K=set(range(len(labels))), q0=q0, d=d, F=F)
+    if keep_labels:
+        return dfa, labels
+    return dfa
+
+
+def write_dfa(dfa: DFA[STATE], f: TextIO, name: Callable[[STATE], str] = str) -> None:
+    """
+    Write a DFA in the text format read by read_dfa, one line at a time.
+    :param name: Gives the name of every state in the file, it must not contain newlines.
+    """
+    names = {state: name(state) for state in dfa.K}
+
+    f.write('#states\n')
+    for state in dfa.K:
+        f.write(f'{names[state]}\n')
+    f.write(f'#initial\n{names[dfa.q0]}\n')
+    f.write('#accepting\n')
+    for state in dfa.F:
+        f.write(f'{names[state]}\n')
+    f.write('#alphabet\n')
+    for symbol in dfa.S:
+        f.write(f'{UNESCAPES.get(symbol, symbol)}\n')
+    f.write('#transitions\n')
+    for (state, symbol), target in dfa.d.items():
+        f.write(f'{names[state]}:{UNESCAPES.get(symbol, symbol)}>{names[target]}\n')
@@ -0,0 +1,286 @@
+import itertools
+import math
+import os
+import tempfile
+import unittest
+
+from src.DFA import DFA
+from src.Regex import parse_regex
+
+
+REGEXES = [
+    'a',
+    'ca | cb',
+    '(a | b)*',
+    '(ab | cd)*',
+    'c(a | b)+',
+    '[0-9]+',
+    '(ab | cd+ | b*)? efg',
+    '(a|(bb*a))(a|(bb*a))*',
+    '(a|b)*c(a|b)*c(a|b)*',
+    'a(b|c)(d|e)|abb|abc',
+]
+
+
+def build(regex: str) -> DFA:
+    return parse_regex(regex).thompson().subset_construction()
+
+
+class MinimizeTests(unittest.TestCase):
+    def test_hopcroft_matches_table_filling(self):
+        for regex in REGEXES:
+            dfa = build(regex)
+            self.assertEqual(dfa.minimize('hopcroft'), dfa.minimize('table'), regex)
+
+    def test_hopcroft_merges_equivalent_states(self):
+        dfa = DFA(
+            {'a'},
+            {0, 1, 2},
+            0,
+            {(0, 'a'): 1, (1, 'a'): 2, (2, 'a'): 1},
+            {1, 2},
+        )
+        dfa_min = dfa.minimize()
+        self.assertEqual(dfa_min.K, {frozenset({0}), frozenset({1, 2})})
+        self.assertEqual(dfa_min.d[(frozenset({1, 2}), 'a')], frozenset({1, 2}))
+
+    def test_unknown_algorithm(self):
+        with self.assertRaises(ValueError):
+            build('a').minimize('brzozowski')
+
+
+class CompiledDFATests(unittest.TestCase):
+    WORDS = ['', 'a', 'ab', 'abc', 'cab', 'acbc', 'ccc', 'abcd', 'efg', 'befg', 'cdcdab', 'bbba', 'zz']
+
+    def test_accept_matches_dfa(self):
+        for regex in REGEXES:
+            dfa = build(regex)
+            compiled = dfa.compile()
+            for word in self.WORDS:
+                self.assertEqual(compiled.accept(word), dfa.accept(word), (regex, word))
+
+    def test_partial_dfa(self):
+        dfa = DFA({'a', 'b'}, {0, 1}, 0, {(0, 'a'): 1}, {1})
+        compiled = dfa.compile()
+        for word in ['', 'a', 'b', 'ab', 'ba', 'bab', 'c']:
+            self.assertEqual(compiled.accept(word), dfa.accept(word), word)
+        self.assertEqual(compiled.final_state('ba'), 1)
+        self.assertEqual(compiled.labels[compiled.run('b')], 0)
+
+    def test_compile_is_cached(self):
+        dfa = DFA({'a', 'b'}, {0, 1}, 0, {(0, 'a'): 1}, {1})
+        compiled = dfa.compile()
+        self.assertIs(dfa.compile(), compiled)
+        self.assertFalse(dfa.is_empty())
+        self.assertIs(dfa.compile(), compiled)
+
+        dfa.F = {0}
+        self.assertIsNot(dfa.compile(), compiled)
+        self.assertEqual(list(dfa.accept_many(['', 'a'])), [True, False])
+        self.assertEqual(dfa.shortest_word(), '')
+
+        dfa.d[(0, 'b')] = 1
+        dfa.invalidate()
+        self.assertEqual(dfa.compile().final_state('b'), 1)
+
+    def test_symbol_classes(self):
+        dfa = build('[a-z]+')
+        compiled = dfa.compile()
+        self.assertEqual(compiled.width, 2)
+        self.assertEqual(len(set(compiled.columns.values())), 1)
+        for word in ['', 'abc', 'zz', 'a1', 'A']:
+            self.assertEqual(compiled.accept(word), dfa.accept(word), word)
+            self.assertEqual(compiled.accept(word.encode()), dfa.accept(word), word)
+
+    def test_many_classes(self):
+        symbols = [chr(ord('A') + i) for i in range(300)]
+        dfa = DFA(
+            set(symbols),
+            set(range(301)),
+            0,
+            {(0, symbol): i + 1 for i, symbol in enumerate(symbols)},
+            {300},
+        )
+        compiled = dfa.compile()
+        self.assertEqual(compiled.width, 301)
+        for word in ['', symbols[-1], symbols[0], symbols[0] + symbols[-1], symbols[-1] + '!']:
+            self.assertEqual(compiled.accept(word), dfa.accept(word), word)
+        self.assertFalse(compiled.accept(b'AB'))
+
+    def test_translation_does_not_grow(self):
+        dfa = build('(ab | cd)*')
+        compiled = dfa.compile()
+        size = len(compiled.translation)
+        word = 'ab' + ''.join(chr(code) for code in range(0x400, 0x2400)) + 'c'
+        self.assertEqual(compiled.accept(word), dfa.accept(word))
+        self.assertEqual(len(compiled.translation), size)
+
+    def test_accept_many(self):
+        for regex in REGEXES:
+            dfa = build(regex)
+            self.assertEqual(list(dfa.accept_many(self.WORDS)), [dfa.accept(word) for word in self.WORDS], regex)
+        self.assertEqual(len(build('a').accept_many([])), 0)
+
+
+class RunnerTests(unittest.TestCase):
+    def test_chunks(self):
+        dfa = build('(a|b)*c(a|b)*c(a|b)*')
+        runner = dfa.runner()
+        for chunk in ['ab', '', 'ca', 'bb', 'c']:
+            runner.feed(chunk)
+        self.assertEqual(runner.is_accepting(), dfa.accept('abcabbc'))
+        self.assertEqual(runner.state, dfa.compile().final_state('abcabbc'))
+
+        runner.reset()
+        self.assertEqual(runner.state, dfa.q0)
+        runner.feed('aba')
+        self.assertEqual(runner.state, dfa.compile().final_state('aba'))
+
+    def test_stops_in_dead_state(self):
+        runner = build('ab').runner()
+        self.assertFalse(runner.feed('b'))
+        self.assertTrue(runner.is_dead())
+        self.assertFalse(runner.feed('ab' * 10000))
+        self.assertFalse(runner.is_accepting())
+
+
+class BufferTests(unittest.TestCase):
+    def test_bytes_like(self):
+        dfa = build('(ab | cd)*')
+        compiled = dfa.compile()
+        for word in ['', 'ab', 'abcd', 'abc', 'cdcdab', 'ba']:
+            data = word.encode()
+            for buffer in (data, bytearray(data), memoryview(data)):
+                self.assertEqual(compiled.accept(buffer), dfa.accept(word), (word, buffer))
+
+    def test_accept_file(self):
+        dfa = build('(ab | cd)*')
+        for word in ['', 'abcdab', 'abd']:
+            with tempfile.NamedTemporaryFile(delete=False) as f:
+                f.write(word.encode())
+            try:
+                self.assertEqual(dfa.accept_file(f.name), dfa.accept(word), word)
+            finally:
+                os.remove(f.name)
+
+    def test_runner_bytes(self):
+        dfa = build('(ab | cd)*')
+        runner = dfa.runner()
+        runner.feed(b'abc')
+        runner.feed(memoryview(b'dab'))
+        self.assertEqual(runner.is_accepting(), dfa.accept('abcdab'))
+
+
+class EquivalenceTests(unittest.TestCase):
+    def brute_force(self, dfa1: DFA, dfa2: DFA, max_length: int = 6) -> str | None:
+        symbols = sorted(dfa1.S | dfa2.S)
+        for length in range(max_length + 1):
+            for word in itertools.product(symbols, repeat=length):
+                word = ''.join(word)
+                if dfa1.accept(word) != dfa2.accept(word):
+                    return word
+        return None
+
+    def test_minimized_is_equivalent(self):
+        for regex in REGEXES:
+            dfa = build(regex)
+            self.assertTrue(dfa.equivalent(dfa.minimize()), regex)
+            self.assertIsNone(dfa.minimize().distinguishing_word(dfa), regex)
+
+    def test_shortest_counterexample(self):
+        dfas = [build(regex) for regex in ['(a | b)*', 'ca | cb', 'c(a | b)+', '(ab | cd)*', 'a', 'a(b|c)(d|e)|abb|abc']]
+        for dfa1, dfa2 in itertools.product(dfas, repeat=2):
+            word = dfa1.distinguishing_word(dfa2)
+            expected = self.brute_force(dfa1, dfa2)
+            if expected is None:
+                self.assertIsNone(word)
+            else:
+                self.assertEqual(len(word), len(expected))
+                self.assertNotEqual(dfa1.accept(word), dfa2.accept(word))
+
+
+class LazyProductTests(unittest.TestCase):
+    WORDS = ['', 'a', 'b', 'ab', 'ba', 'aab', 'abab', 'bbb', 'abb']
+
+    def test_operations(self):
+        dfa1 = build('(a | b)*b')
+        dfa2 = build('a(a | b)*')
+        for product, expected in [
+            (dfa1.intersection(dfa2), lambda x, y: x and y),
+            (dfa1.union(dfa2), lambda x, y: x or y),
+            (dfa1.difference(dfa2), lambda x, y: x and not y),
+            (dfa1.symmetric_difference(dfa2), lambda x, y: x != y),
+        ]:
+            materialized = product.materialize()
+            for word in self.WORDS:
+                ref = expected(dfa1.accept(word), dfa2.accept(word))
+                self.assertEqual(product.accept(word), ref, word)
+                self.assertEqual(materialized.accept(word), ref, word)
+
+    def test_is_empty(self):
+        dfa = build('(ab | cd)*')
+        self.assertTrue(dfa.symmetric_difference(dfa.minimize()).is_empty())
+        self.assertFalse(build('(ab)*').difference(dfa).is_empty())
+
+    def test_explores_on_demand(self):
+        dfa = build('(a|b)*c(a|b)*c(a|b)*')
+        product = dfa.intersection(dfa)
+        product.accept('ab')
+        self.assertEqual(len(product.d), 2)
+
+
+class LanguageQueryTests(unittest.TestCase):
+    def test_finite_language(self):
+        dfa = DFA(
+            {'a', 'b'},
+            {0, 1, 2, 3},
+            0,
+            {(0, 'a'): 1, (0, 'b'): 3, (1, 'a'): 3, (1, 'b'): 2, (2, 'a'): 3, (2, 'b'): 3, (3, 'a'): 3, (3, 'b'): 3},
+            {1, 2},
+        )
+        self.assertFalse(dfa.is_empty())
+        self.assertTrue(dfa.is_finite())
+        self.assertEqual(dfa.shortest_word(), 'a')
+        self.assertEqual(dfa.max_word_length(), 2)
+
+    def test_infinite_language(self):
+        dfa = DFA({'a', 'b'}, {0, 1}, 0, {(0, 'a'): 1, (0, 'b'): 0, (1, 'a'): 1, (1, 'b'): 0}, {1})
+        self.assertFalse(dfa.is_finite())
+        self.assertEqual(dfa.max_word_length(), math.inf)
+        self.assertEqual(dfa.shortest_word(), 'a')
+
+    def test_empty_language(self):
+        dfa = DFA({'a'}, {0, 1}, 0, {(0, 'a'): 0, (1, 'a'): 1}, {1})
+        self.assertTrue(dfa.is_empty())
+        self.assertTrue(dfa.is_finite())
+        self.assertIsNone(dfa.shortest_word())
+        self.assertIsNone(dfa.max_word_length())
+
+    def test_shortest_word_is_accepted(self):
+        for regex in REGEXES:
+            dfa = build(regex)
+            word = dfa.shortest_word()
+            self.assertTrue(word is None or dfa.accept(word), regex)
+
+
+class CanonicalizeTests(unittest.TestCase):
+    def test_bfs_numbering(self):
+        dfa = DFA(
+            {'a', 'b'},
+            {'s', 't', 'u', 'dead'},
+            's',
+            {('s', 'a'): 'u', ('s', 'b'): 't', ('t', 'a'): 't', ('t', 'b'): 't', ('u', 'a'): 's', ('u', 'b'): 't',
+             ('dead', 'a'): 's', ('dead', 'b'): 's'},
+            {'t', 'dead'},
+        )
+        canonical, labels = dfa.canonicalize(keep_labels=True)
+        self.assertEqual(labels, ['s', 'u', 't'])
+        self.assertEqual(canonical.K, {0, 1, 2})
+        self.assertEqual(canonical.F, {2})
+        self.assertEqual(canonical.d[(1, 'a')], 0)
+        self.assertEqual(canonical.remap_states(lambda i: labels[i]).d, {k: v for k, v in dfa.d.items() if k[0] != 'dead'})
+
+    def test_equivalent(self):
+        for regex in REGEXES:
+            dfa = build(regex)
+            self.assertTrue(dfa.equivalent(dfa.canonicalize()), regex)
@@ -0,0 +1,106 @@
+import io
+import os
+import tempfile
+import unittest
+
+from src import Binary, TextFormat
+from src.CompiledDFA import CompiledDFA
+from src.NFA import NFA
+from src.Regex import parse_regex
+
+
+class BinaryFormatTests(unittest.TestCase):
+    WORDS = ['', 'a', 'ab', 'abc', 'cab', 'acbc', 'ccc', 'abcd', 'ca', 'cb']
+
+    def setUp(self):
+        f = tempfile.NamedTemporaryFile(delete=False)
+        f.close()
+        self.path = f.name
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_dfa_round_trip(self):
+        for regex in ['ca | cb', '(a|b)*c(a|b)*c(a|b)*', '[a-z]+']:
+            dfa = parse_regex(regex).thompson().subset_construction()
+            Binary.save(dfa, self.path)
+            for mmap in (True, False):
+                loaded = Binary.load(self.path, mmap=mmap)
+                self.assertIsInstance(loaded, CompiledDFA)
+                for word in self.WORDS:
+                    self.assertEqual(loaded.accept(word), dfa.accept(word), (regex, word))
+                self.assertEqual(loaded.is_finite(), dfa.is_finite())
+            del loaded
+
+    def test_nfa_round_trip(self):
+        nfa = NFA(
+            {'a', 'b'},
+            {'s', 't', 'u'},
+            't',
+            {('t', 'a'): {'s', 'u'}, ('s', ''): {'t'}, ('u', 'b'): {'u'}},
+            {'u'},
+        )
+        Binary.save(nfa, self.path)
+        loaded = Binary.load(self.path, mmap=False)
+        self.assertEqual(loaded.S, nfa.S)
+        self.assertEqual(len(loaded.K), 3)
+        self.assertTrue(loaded.subset_construction().minimize().canonicalize().equivalent(
+            nfa.subset_construction().minimize().canonicalize()))
+
+    @unittest.skipIf(Binary.np is None, 'numpy is not installed')
+    def test_npz(self):
+        dfa = parse_regex('ca | cb').thompson().subset_construction()
+        Binary.save_npz(dfa, self.path + '.npz')
+        try:
+            with Binary.np.load(self.path + '.npz') as data:
+                compiled = dfa.compile()
+                self.assertEqual(data['transitions'].shape, (len(compiled.labels), compiled.width - 1))
+                self.assertEqual(list(data['final']), [f == 1 for f in compiled.final])
+        finally:
+            os.remove(self.path + '.npz')
+
+    def test_invalid_file(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'#states\n')
+        with self.assertRaises(ValueError):
+            Binary.load(self.path)
+
+    def test_truncated_file(self):
+        nfa = NFA({'a', 'b'}, {0, 1}, 0, {(0, 'a'): {0, 1}, (1, ''): {0}}, {1})
+        for automaton in (nfa.subset_construction(), nfa):
+            Binary.save(automaton, self.path)
+            with open(self.path, 'rb') as f:
+                data = f.read()
+            for length in range(len(data)):
+                with open(self.path, 'wb') as f:
+                    f.write(data[:length])
+                for mmap in (True, False):
+                    with self.assertRaises(ValueError, msg=(automaton, length, mmap)):
+                        Binary.load(self.path, mmap=mmap)
+
+
+class TextFormatTests(unittest.TestCase):
+    def test_read_fixtures(self):
+        for directory in ['./tests_1', './tests_2']:
+            for file_name in sorted(os.listdir(directory)):
+                with open(os.path.join(directory, file_name)) as f:
+                    dfa, labels = TextFormat.read_dfa(f, keep_labels=True)
+                self.assertEqual(len(dfa.K), len(labels), file_name)
+                for state in dfa.K:
+                    for symbol in dfa.S:
+                        self.assertIn((state, symbol), dfa.d, file_name)
+
+    def test_escaped_symbols(self):
+        with open('./tests_2/3.txt') as f:
+            dfa = TextFormat.read_dfa(f)
+        self.assertIn('\n', dfa.S)
+        self.assertTrue(dfa.accept('ab\ncd'))
+
+    def test_round_trip(self):
+        dfa = parse_regex(r'[a-z]*\ [a-z]*').thompson().subset_construction().minimize().canonicalize()
+        with io.StringIO() as f:
+            TextFormat.write_dfa(dfa, f)
+            f.seek(0)
+            loaded = TextFormat.read_dfa(f)
+        self.assertIn(' ', loaded.S)
+        self.assertEqual(loaded, dfa)
@@ -0,0 +1,229 @@
+import itertools
+import random
+import time
+import unittest
+
+from src.LazyDFA import LazyDFA
+from src.NFA import NFA
+from src.Regex import parse_regex
+
+
+def epsilon_nfa() -> NFA:
+    return NFA(
+        {'a', 'b'},
+        {0, 1, 2, 3, 4, 5, 6, 7},
+        0,
+        {
+            (0, ''): {1, 2},
+            (1, ''): {0},
+            (2, ''): {4, 6},
+            (3, ''): {1},
+            (4, 'a'): {5},
+            (5, ''): {3},
+            (6, 'b'): {7},
+            (7, ''): {3}
+        },
+        {1},
+    )
+
+
+def pattern_nfa(k: int) -> NFA:
+    # (a|b)*a(a|b)^k, whose DFA has 2^(k+1) states
+    d = {(0, 'a'): {0, 1}, (0, 'b'): {0}}
+    for i in range(1, k + 1):
+        d[(i, 'a')] = {i + 1}
+        d[(i, 'b')] = {i + 1}
+    return NFA({'a', 'b'}, set(range(k + 2)), 0, d, {k + 1})
+
+
+class RemapTests(unittest.TestCase):
+    def test_remap_merges_targets(self):
+        nfa = NFA(
+            {'a'},
+            {0, 1, 2},
+            0,
+            {(0, 'a'): {1}, (2, 'a'): {0}, (0, ''): {2}},
+            {1},
+        )
+        remapped = nfa.remap_states(lambda state: state % 2)
+        self.assertEqual(remapped.K, {0, 1})
+        self.assertEqual(remapped.d, {(0, 'a'): {0, 1}, (0, ''): {0}})
+        self.assertEqual(remapped.F, {1})
+
+
+class EpsilonClosureTests(unittest.TestCase):
+    def test_matches_single_closures(self):
+        nfa = epsilon_nfa()
+        closures = nfa.epsilon_closures()
+        for state in nfa.K:
+            self.assertEqual(closures[state], nfa.epsilon_closure(state))
+        self.assertEqual(nfa.closure_of_set({4, 6}), {4, 6})
+        self.assertEqual(nfa.closure_of_set({5, 6}), {0, 1, 2, 3, 4, 5, 6})
+
+    def test_cache_invalidation(self):
+        nfa = epsilon_nfa()
+        self.assertIs(nfa.epsilon_closures(), nfa.epsilon_closures())
+        nfa.d = {**nfa.d, (4, ''): {7}}
+        self.assertEqual(nfa.epsilon_closures()[4], nfa.epsilon_closure(4))
+
+        nfa.d[(6, '')] = {5}
+        nfa.invalidate()
+        self.assertEqual(nfa.epsilon_closures()[6], nfa.epsilon_closure(6))
+
+
+class SubsetConstructionTests(unittest.TestCase):
+    def test_sink_state(self):
+        nfa = NFA({'a', 'b'}, {0, 1}, 0, {(0, 'a'): {1}, (0, ''): {0}}, {1})
+        dfa = nfa.subset_construction()
+        sink = frozenset({'x'})
+        self.assertEqual(dfa.K, {frozenset({0}), frozenset({1}), sink})
+        self.assertEqual(dfa.F, {frozenset({1})})
+        self.assertEqual(dfa.d[(frozenset({0}), 'b')], sink)
+        self.assertEqual(dfa.d[(sink, 'a')], sink)
+        self.assertEqual(len(dfa.d), 6)
+
+    def test_bitset_backend(self):
+        nfa = NFA(
+            {'a', 'b'},
+            {0, 1, 2, 3},
+            0,
+            {(0, 'a'): {0, 1}, (0, 'b'): {0}, (1, 'a'): {2}, (1, 'b'): {2}, (2, ''): {3}},
+            {3},
+        )
+        dfa = nfa.subset_construction()
+        self.assertEqual(nfa.subset_construction('bitset'), dfa)
+
+        masks = nfa.subset_construction('bitset', 'bitmask')
+        self.assertEqual(len(masks.K), len(dfa.K))
+        self.assertTrue(masks.equivalent(dfa))
+        self.assertEqual(nfa.bitset().states_of(masks.q0), dfa.q0)
+
+        with self.assertRaises(ValueError):
+            nfa.subset_construction('sets', 'bitmask')
+
+    def test_bitset_cache_invalidation(self):
+        nfa = NFA({'a'}, {0, 1}, 0, {(0, 'a'): {1}}, {1})
+        self.assertTrue(nfa.accept('a'))
+        nfa.F = {0}
+        self.assertTrue(nfa.accept(''))
+        self.assertEqual(nfa.subset_construction('bitset').F, {frozenset({0})})
+        nfa.q0 = 1
+        self.assertFalse(nfa.accept(''))
+        self.assertEqual(nfa.subset_construction('bitset'), nfa.subset_construction())
+
+
+class SimulationTests(unittest.TestCase):
+    def test_accept_matches_dfa(self):
+        nfa = pattern_nfa(3)
+        dfa = nfa.subset_construction()
+        for word in itertools.product('ab', repeat=6):
+            word = ''.join(word)
+            self.assertEqual(nfa.accept(word), dfa.accept(word), word)
+        self.assertFalse(nfa.accept('aaac'))
+
+    def test_long_pattern(self):
+        nfa = pattern_nfa(40)
+        self.assertTrue(nfa.accept('b' * 100 + 'a' + 'b' * 40))
+        self.assertFalse(nfa.accept('b' * 100 + 'a' + 'b' * 41))
+
+    def test_run_chunks(self):
+        nfa = pattern_nfa(2)
+        self.assertEqual(nfa.run(['ba', '', 'b']), {0, 2})
+        self.assertEqual(nfa.run(['c', 'a']), set())
+
+
+class LazyDFATests(unittest.TestCase):
+    def test_accept_matches_nfa(self):
+        nfa = pattern_nfa(3)
+        lazy = LazyDFA(nfa)
+        for length in range(7):
+            for word in itertools.product('abc', repeat=length):
+                word = ''.join(word)
+                self.assertEqual(lazy.accept(word), nfa.accept(word), word)
+        self.assertEqual(lazy.flushes, 0)
+        # every DFA state plus the dead state reached on 'c'
+        self.assertEqual(len(lazy), len(nfa.subset_construction('bitset', 'bitmask').K) + 1)
+        self.assertGreater(lazy.hits, lazy.misses)
+
+    def test_bounded_cache(self):
+        nfa = pattern_nfa(6)
+        lazy = LazyDFA(nfa, max_states=8, min_progress=1)
+        word = 'a' * 5000 + ''.join(random.Random(0).choice('ab') for _ in range(200))
+        self.assertEqual(lazy.accept(word), nfa.accept(word))
+        self.assertLessEqual(len(lazy), 8)
+        self.assertGreater(lazy.flushes, 0)
+        self.assertEqual(lazy.fallbacks, 0)
+
+    def test_falls_back_to_simulation(self):
+        nfa = pattern_nfa(10)
+        lazy = LazyDFA(nfa, max_states=4)
+        word = 'ab' * 50 + 'a' + 'b' * 10
+        self.assertTrue(lazy.accept(word))
+        self.assertGreater(lazy.fallbacks, 0)
+
+
+class EpsilonRemovalTests(unittest.TestCase):
+    def test_equivalent_and_epsilon_free(self):
+        nfa = epsilon_nfa()
+        reduced = nfa.remove_epsilons()
+        self.assertFalse(any(symbol == '' for _, symbol in reduced.d))
+        self.assertTrue(reduced.subset_construction().equivalent(nfa.subset_construction()))
+        for length in range(6):
+            for word in itertools.product('ab', repeat=length):
+                word = ''.join(word)
+                self.assertEqual(reduced.accept(word), nfa.accept(word), word)
+
+    def test_prunes_unreachable_states(self):
+        nfa = NFA({'a'}, {0, 1, 2, 3}, 0, {(0, ''): {1}, (1, 'a'): {2}, (3, 'a'): {0}}, {2})
+        reduced = nfa.remove_epsilons()
+        self.assertEqual(reduced.K, {0, 2})
+        self.assertEqual(reduced.d, {(0, 'a'): {2}})
+        self.assertEqual(reduced.F, {2})
+
+
+class ReduceTests(unittest.TestCase):
+    def test_merges_bisimilar_states(self):
+        # 1 and 2 both read 'b' into a final state, 3 and 4 are both final dead ends
+        nfa = NFA(
+            {'a', 'b'},
+            {0, 1, 2, 3, 4},
+            0,
+            {(0, 'a'): {1, 2}, (1, 'b'): {3}, (2, 'b'): {4}},
+            {3, 4},
+        )
+        reduced = nfa.reduce()
+        self.assertEqual(len(reduced.K), 3)
+        self.assertEqual(reduced.q0, 0)
+        self.assertTrue(reduced.subset_construction().equivalent(nfa.subset_construction()))
+
+    def test_subset_construction_after_reduce(self):
+        nfa = epsilon_nfa()
+        dfa = nfa.subset_construction(reduce=True)
+        self.assertTrue(dfa.equivalent(nfa.subset_construction()))
+        self.assertLessEqual(len(nfa.reduce().K), len(nfa.K))
+
+    def test_long_thompson_chain(self):
+        nfa = parse_regex('(a|b)' * 834).thompson()
+        self.assertGreater(len(nfa.K), 5000)
+        start = time.perf_counter()
+        reduced = nfa.reduce()
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertLess(len(reduced.K), len(nfa.K))
+        word = 'ab' * 417
+        self.assertTrue(reduced.accept(word))
+        self.assertFalse(reduced.accept(word[:-1]))
+
+
+class ParallelSubsetConstructionTests(unittest.TestCase):
+    def test_same_dfa_as_sequential(self):
+        nfa = pattern_nfa(5)
+        dfa = nfa.subset_construction()
+        self.assertEqual(nfa.subset_construction(workers=2, chunk_size=3), dfa)
+        masks = nfa.subset_construction('bitset', 'bitmask')
+        self.assertEqual(nfa.subset_construction('bitset', 'bitmask', workers=2, chunk_size=1), masks)
+
+    def test_unknown_backend(self):
+        nfa = pattern_nfa(2)
+        for options in ({}, {'workers': 2}, {'reduce': True}):
+            with self.assertRaises(ValueError):
+                nfa.subset_construction('bogus', **options)
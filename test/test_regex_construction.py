@@ -0,0 +1,174 @@
+import copy
+import dataclasses
+import itertools
+import pickle
+import re
+import unittest
+
+from src.Derivatives import EPSILON as EMPTY_WORD, Terms
+from src.Regex import Character, CharacterClass, Concat, Question_Mark, Star, concat, factors, parse_regex, star, union
+
+
+REGEXES = [
+    'a',
+    'ca | cb',
+    'c(a | b)',
+    '(a | b)*',
+    '(ab | cd)*',
+    'c(a | b)?',
+    'c(a | b)+',
+    '[0-9]+',
+    '(ab | cd+ | b*)? efg',
+    '(a|(bb*a))(a|(bb*a))*',
+    '(a|b)*c(a|b)*c(a|b)*',
+    'a(b|c)(d|e)|abb|abc',
+]
+
+
+def words(symbols: str, max_length: int):
+    for length in range(max_length + 1):
+        for word in itertools.product(symbols, repeat=length):
+            yield ''.join(word)
+
+
+class ThompsonBuilderTests(unittest.TestCase):
+    def test_matches_re(self):
+        for regex in REGEXES:
+            nfa = parse_regex(regex).thompson()
+            pattern = re.compile(regex.replace(' ', ''))
+            for word in words('abcdefg0', 4):
+                self.assertEqual(nfa.accept(word), pattern.fullmatch(word) is not None, (regex, word))
+
+    def test_state_count(self):
+        nfa = parse_regex('(ab | c)*').thompson()
+        self.assertEqual(len(nfa.K), 10)
+        self.assertEqual(nfa.S, {'a', 'b', 'c'})
+
+    def test_deep_regex(self):
+        regex = Character('a')
+        for _ in range(5000):
+            regex = Concat(regex, Character('a'))
+        nfa = regex.thompson()
+        self.assertEqual(len(nfa.K), 10002)
+        self.assertTrue(nfa.accept('a' * 5001))
+
+    def test_deep_common_prefix(self):
+        prefix = 'a' * 1500
+        regex = parse_regex(f'{prefix}b|{prefix}c').simplify()
+        self.assertIs(factors(regex)[-1], CharacterClass('b', 'c'))
+        self.assertEqual(len(factors(regex)), 1501)
+        nfa = regex.thompson()
+        self.assertTrue(nfa.accept(prefix + 'c'))
+        self.assertFalse(nfa.accept(prefix + 'd'))
+
+
+class GlushkovTests(unittest.TestCase):
+    def test_matches_re(self):
+        for regex in REGEXES:
+            nfa = parse_regex(regex).glushkov()
+            pattern = re.compile(regex.replace(' ', ''))
+            for word in words('abcdefg0', 4):
+                self.assertEqual(nfa.accept(word), pattern.fullmatch(word) is not None, (regex, word))
+
+    def test_one_state_per_position(self):
+        nfa = parse_regex('(ab | [0-9])*a').glushkov()
+        self.assertEqual(len(nfa.K), 5)
+        self.assertFalse(any(symbol == '' for _, symbol in nfa.d))
+        self.assertEqual(nfa.d[(0, '7')], {3})
+        self.assertEqual(nfa.F, {4})
+
+    def test_nullable(self):
+        nfa = parse_regex('a*b?').glushkov()
+        self.assertIn(0, nfa.F)
+        self.assertTrue(nfa.subset_construction().equivalent(parse_regex('a*b?').thompson().subset_construction()))
+
+
+class DerivativeTests(unittest.TestCase):
+    def test_matches_re(self):
+        for regex in REGEXES:
+            dfa = parse_regex(regex).to_dfa_derivatives()
+            pattern = re.compile(regex.replace(' ', ''))
+            for word in words('abcdefg0', 4):
+                if set(word) <= dfa.S:
+                    self.assertEqual(dfa.accept(word), pattern.fullmatch(word) is not None, (regex, word))
+
+    def test_near_minimal(self):
+        for regex in REGEXES:
+            dfa = parse_regex(regex).to_dfa_derivatives()
+            reference = parse_regex(regex).thompson().subset_construction()
+            self.assertTrue(dfa.equivalent(reference), regex)
+            self.assertLessEqual(len(dfa.K), len(reference.K), regex)
+            self.assertEqual(len(dfa.minimize().K), len(reference.minimize().K), regex)
+
+    def test_deep_regexes(self):
+        regex = Character('a')
+        for _ in range(3000):
+            regex = Concat(regex, Character('b'))
+        dfa = regex.to_dfa_derivatives()
+        self.assertTrue(dfa.accept('a' + 'b' * 3000))
+        self.assertFalse(dfa.accept('a' + 'b' * 2999))
+
+        # a chain of 2000 nullable factors, its derivative walks the whole chain
+        terms = Terms()
+        optional = terms.alt(EMPTY_WORD, terms.symbols(frozenset('a')))
+        term = terms.cat(*[optional] * 2000)
+        derivative = terms.derivative(term, 'a')
+        self.assertEqual(len(terms.nodes[derivative][1]), 2000)
+        self.assertTrue(terms.nullable[derivative])
+
+
+class FollowposTests(unittest.TestCase):
+    def test_matches_re(self):
+        for regex in REGEXES:
+            dfa = parse_regex(regex).to_dfa_followpos()
+            pattern = re.compile(regex.replace(' ', ''))
+            for word in words('abcdefg0', 4):
+                if set(word) <= dfa.S:
+                    self.assertEqual(dfa.accept(word), pattern.fullmatch(word) is not None, (regex, word))
+
+    def test_position_sets(self):
+        # positions: a=1, b=2, end marker=3
+        dfa = parse_regex('(a|b)*').to_dfa_followpos()
+        self.assertEqual(dfa.q0, 0b1110)
+        self.assertEqual(dfa.K, {0b1110})
+        self.assertEqual(dfa.F, {0b1110})
+        self.assertTrue(parse_regex('ab').to_dfa_followpos().equivalent(parse_regex('ab').glushkov().subset_construction()))
+
+
+class HashConsingTests(unittest.TestCase):
+    def test_equal_nodes_are_shared(self):
+        self.assertIs(Character('a'), Character('a'))
+        self.assertIs(Concat(Character('a'), Character('b')), Concat(left=Character('a'), right=Character('b')))
+        self.assertIs(parse_regex('(ab | c)*'), parse_regex('(ab | c)*'))
+        self.assertIsNot(Character('a'), Character('b'))
+
+    def test_nodes_are_immutable(self):
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            Character('a').char = 'z'
+        self.assertEqual(Character('a').char, 'a')
+
+    def test_copy_and_pickle_keep_identity(self):
+        regex = parse_regex('(ab | cd+ | [0-9]*)? efg')
+        self.assertIs(copy.copy(regex), regex)
+        self.assertIs(copy.deepcopy(regex), regex)
+        self.assertIs(pickle.loads(pickle.dumps(regex)), regex)
+
+    def test_star_rules(self):
+        a = Character('a')
+        self.assertIs(star(star(a)), star(a))
+        self.assertIs(parse_regex('((a)?)*').simplify(), Star(a))
+        self.assertIs(parse_regex('(a+)*').simplify(), Star(a))
+
+    def test_union_rules(self):
+        a, b = Character('a'), Character('b')
+        self.assertIs(union(a, a), a)
+        self.assertIs(union(a, b, Character('c')), CharacterClass('a', 'c'))
+        self.assertIs(parse_regex('ab | ac').simplify(), concat(a, CharacterClass('b', 'c')))
+        self.assertIs(parse_regex('a | ab').simplify(), concat(a, Question_Mark(b)))
+
+    def test_simplify_keeps_language(self):
+        for regex in REGEXES:
+            nfa = parse_regex(regex).simplify().thompson()
+            pattern = re.compile(regex.replace(' ', ''))
+            for word in words('abcdefg0', 4):
+                self.assertEqual(nfa.accept(word), pattern.fullmatch(word) is not None, (regex, word))